@@ -0,0 +1,261 @@
+# app/artifact.py
+# Compact model artifact: pruned tree arrays stored with small dtypes in a
+# single .npz, loaded straight into app.engine without unpickling sklearn.
+#
+#   python -m app.artifact model/model.pkl model/model.npz
+import argparse
+import hashlib
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.engine import AdditiveEngine, LinearEngine, SklearnEngine, TreeEnsembleEngine
+from app.schema import FEATURES, round_strength
+
+FORMAT_VERSION = 1
+CALIBRATION_KEYS = ("alpha", "q", "eps", "n")
+
+
+# ------------------------------------------------
+# EXPORT
+# ------------------------------------------------
+def _prune_tree(tree):
+    """Collapse splits whose two leaves predict the same value.
+
+    Returns (feature, threshold, left, right, value, depth) for the pruned
+    tree renumbered in pre-order, with leaves pointing at themselves.
+    """
+    children_left, children_right = tree.children_left, tree.children_right
+    is_leaf = children_left == -1
+    value = tree.value[:, 0, 0].astype(np.float64)
+
+    # scikit-learn numbers children after their parent, so a reverse scan is bottom-up
+    for node in range(tree.node_count - 1, -1, -1):
+        if is_leaf[node]:
+            continue
+        left, right = children_left[node], children_right[node]
+        if is_leaf[left] and is_leaf[right] and value[left] == value[right]:
+            is_leaf[node] = True
+            value[node] = value[left]
+
+    order, depths, new_id = [], [], {}
+    stack = [(0, 0)]
+    while stack:
+        node, depth = stack.pop()
+        new_id[node] = len(order)
+        order.append(node)
+        depths.append(depth)
+        if not is_leaf[node]:
+            stack.append((children_right[node], depth + 1))
+            stack.append((children_left[node], depth + 1))
+
+    order = np.array(order)
+    leaf = is_leaf[order]
+    self_id = np.arange(len(order))
+    left = np.where(leaf, self_id, [new_id.get(children_left[n], -1) for n in order])
+    right = np.where(leaf, self_id, [new_id.get(children_right[n], -1) for n in order])
+    feature = np.where(leaf, 0, tree.feature[order])
+    threshold = np.where(leaf, 0.0, tree.threshold[order])
+    return feature, threshold, left, right, value[order], max(depths)
+
+
+def _float32_floor(threshold):
+    """Largest float32 <= each threshold.
+
+    Inputs are compared as float32, so `x <= t` and `x <= floor32(t)` agree
+    exactly; rounding to nearest could flip rows that sit on a split.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    rounded = threshold.astype(np.float32)
+    above = rounded.astype(np.float64) > threshold
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _tree_arrays(estimators):
+    parts = [_prune_tree(est.tree_) for est in estimators]
+    node_count = np.array([len(p[0]) for p in parts], dtype=np.int32)
+    index_dtype = np.int16 if node_count.max() <= np.iinfo(np.int16).max else np.int32
+    return {
+        "kind": np.array("trees"),
+        "node_count": node_count,
+        "feature": np.concatenate([p[0] for p in parts]).astype(np.int8),
+        "threshold": _float32_floor(np.concatenate([p[1] for p in parts])),
+        "left": np.concatenate([p[2] for p in parts]).astype(index_dtype),
+        "right": np.concatenate([p[3] for p in parts]).astype(index_dtype),
+        # Leaf values stay float64: forest means often land on x.xx5, and
+        # float32 leaves would round some of them to a different 2 decimals
+        "value": np.concatenate([p[4] for p in parts]),
+        "depth": np.array(max(p[5] for p in parts), dtype=np.int32),
+    }
+
+
+def model_arrays(model):
+    """Return the artifact arrays for a fitted LinearRegression, tree, forest or AdditiveEngine."""
+    if isinstance(model, AdditiveEngine):
+        return {
+            "kind": np.array("additive"),
+            "start": model.start,
+            "step": model.step,
+            "size": model.size.astype(np.int32),
+            "tables": model.tables.astype(np.float32),
+            "bias": np.array(model.bias),
+            "clip": np.array([model.lower, model.upper]),
+        }
+    if hasattr(model, "estimators_"):
+        return _tree_arrays(model.estimators_)
+    if hasattr(model, "tree_"):
+        return _tree_arrays([model])
+    if hasattr(model, "coef_"):
+        return {
+            "kind": np.array("linear"),
+            "coef": np.ravel(model.coef_).astype(np.float64),
+            "intercept": np.array(np.ravel(model.intercept_)[0], dtype=np.float64),
+        }
+    raise TypeError(f"Cannot export model of type {type(model).__name__}")
+
+
+def export_model(model, path, compress=True, calibration=None):
+    """Write `model` as a compact .npz artifact and return its path.
+
+    `calibration` is an optional conformal calibration from app.conformal.calibrate.
+    """
+    arrays = model_arrays(model)
+    if calibration is not None:
+        arrays.update({f"conformal_{key}": np.array(calibration[key]) for key in CALIBRATION_KEYS})
+    arrays["format_version"] = np.array(FORMAT_VERSION, dtype=np.int32)
+    arrays["features"] = np.array(FEATURES)
+    save = np.savez_compressed if compress else np.savez
+    # Write beside the target and swap it in atomically, so a serving process
+    # hot-reloading `path` never opens a half-written archive
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        save(f, **arrays)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ------------------------------------------------
+# LOAD
+# ------------------------------------------------
+def load_artifact(path):
+    """Load a .npz artifact written by export_model into a serving engine."""
+    with np.load(path) as data:
+        if int(data["format_version"]) != FORMAT_VERSION:
+            raise ValueError(f"Unsupported artifact version {int(data['format_version'])} in {path}")
+        if list(data["features"]) != FEATURES:
+            raise ValueError(f"Artifact {path} was trained on features {list(data['features'])}")
+
+        kind = str(data["kind"])
+        if kind == "linear":
+            return LinearEngine(data["coef"], data["intercept"])
+        if kind == "additive":
+            lower, upper = data["clip"]
+            return AdditiveEngine(
+                data["start"], data["step"], data["size"], data["tables"], data["bias"], lower, upper
+            )
+        if kind == "trees":
+            node_count = data["node_count"].astype(np.intp)
+            roots = np.concatenate([[0], np.cumsum(node_count)[:-1]])
+            shift = np.repeat(roots, node_count)
+            engine = TreeEnsembleEngine(
+                roots=roots,
+                feature=data["feature"],
+                threshold=data["threshold"],
+                left=data["left"].astype(np.intp) + shift,
+                right=data["right"].astype(np.intp) + shift,
+                value=data["value"],
+                depth=data["depth"],
+            )
+            if "conformal_q" in data:
+                engine.calibration = {key: data[f"conformal_{key}"].item() for key in CALIBRATION_KEYS}
+                engine.interval_alpha = engine.calibration["alpha"]
+            return engine
+    raise ValueError(f"Unknown artifact kind {kind!r} in {path}")
+
+
+# MODEL_ENGINE=model serves the trained model: the compact artifact written by
+# train_model.py, or the joblib pickle when it has not been exported.
+# MODEL_ENGINE=surrogate serves the distilled lookup surrogate
+# (train_model.py --distill). MODEL_PATH overrides either.
+ENGINE_PATHS = {
+    "model": ("model/model.npz", "model/model.pkl"),
+    "surrogate": ("model/surrogate.npz",),
+}
+
+
+def resolve_model_path(engine_name=None):
+    """Path of the model the API serves, from MODEL_PATH / MODEL_ENGINE."""
+    if os.getenv("MODEL_PATH"):
+        return os.environ["MODEL_PATH"]
+    engine_name = engine_name or os.getenv("MODEL_ENGINE", "model")
+    if engine_name not in ENGINE_PATHS:
+        raise ValueError(f"MODEL_ENGINE must be one of {sorted(ENGINE_PATHS)}, got {engine_name!r}")
+    candidates = ENGINE_PATHS[engine_name]
+    return next((path for path in candidates if os.path.exists(path)), candidates[-1])
+
+
+def model_version(path):
+    """Short content hash of a model file; changes whenever the model does."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def load_engine(path):
+    """Load either a compact .npz artifact or a joblib pickle."""
+    if path.endswith(".npz"):
+        return load_artifact(path)
+    return SklearnEngine(joblib.load(path))
+
+
+# ------------------------------------------------
+# REPORT
+# ------------------------------------------------
+def _timed_load(loader, path, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loaded = loader(path)
+        best = min(best, time.perf_counter() - start)
+    return loaded, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a pickled model to the compact .npz artifact")
+    parser.add_argument("pickle", nargs="?", default="model/model.pkl")
+    parser.add_argument("output", nargs="?", default="model/model.npz")
+    parser.add_argument("--no-compress", action="store_true")
+    parser.add_argument("--data", default="data/coffee_strength_dataset.csv")
+    args = parser.parse_args()
+
+    model, pickle_load = _timed_load(joblib.load, args.pickle)
+    export_model(model, args.output, compress=not args.no_compress)
+    engine, artifact_load = _timed_load(load_artifact, args.output)
+
+    df = pd.read_csv(args.data)
+    X = df[FEATURES].to_numpy(dtype=np.float64)
+    y = df["coffee_strength"].to_numpy()
+    original = SklearnEngine(model).predict(X)
+    compact = engine.predict(X)
+    delta = np.abs(original - compact)
+    # What users see: recommended_strength rounded to 2 decimals
+    rounded_mismatch = int((round_strength(original) != round_strength(compact)).sum())
+
+    def rmse(pred):
+        return float(np.sqrt(np.mean((y - pred) ** 2)))
+
+    print(f"{'':>10} {'size':>12} {'load':>10} {'RMSE':>8}")
+    print(f"{'pickle':>10} {os.path.getsize(args.pickle):>12,} {pickle_load * 1e3:>8.1f}ms {rmse(original):>8.4f}")
+    print(f"{'artifact':>10} {os.path.getsize(args.output):>12,} {artifact_load * 1e3:>8.1f}ms {rmse(compact):>8.4f}")
+    print(f"max |delta| = {delta.max():.2e}, mean |delta| = {delta.mean():.2e} over {len(X)} rows")
+    print(f"rounded recommended_strength differs on {rounded_mismatch} of {len(X)} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# app/bulk_score.py
+# Offline bulk scoring for large check-in exports.
+#
+#   python -m app.bulk_score checkins.csv scored.csv --chunk-size 100000 --workers 4
+#
+# Input is streamed in chunks (CSV, or Parquet when pyarrow is installed), each
+# chunk is predicted in one vectorized call on a worker process, and results are
+# appended to the output in input order. Memory stays bounded by
+# chunk_size * (2 * workers) rows whatever the file size.
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.artifact import load_engine, resolve_model_path
+from app.schema import FEATURES, domain_mask, round_strength
+
+OUTPUT_COLUMN = "recommended_strength"
+
+_engine = None
+
+
+# ------------------------------------------------
+# WORKERS
+# ------------------------------------------------
+def _init_worker(model_path):
+    global _engine
+    _engine = load_engine(model_path)
+
+
+def score_features(X):
+    """Predict an (n, 4) matrix like POST /predict would, with NaN for rows it would reject."""
+    X = np.asarray(X, dtype=np.float64)
+    scores = np.full(len(X), np.nan)
+    ok = domain_mask(X)
+    if ok.any():
+        scores[ok] = round_strength(_engine.predict(X[ok]))
+    return scores
+
+
+class _InlineExecutor:
+    """Stand-in for the process pool when scoring with a single worker."""
+
+    def __init__(self, model_path):
+        _init_worker(model_path)
+
+    def submit(self, fn, *args):
+        return _Done(fn(*args))
+
+    def shutdown(self):
+        pass
+
+
+class _Done:
+    def __init__(self, value):
+        self.value = value
+
+    def result(self):
+        return self.value
+
+
+# ------------------------------------------------
+# INPUT / OUTPUT
+# ------------------------------------------------
+def _is_parquet(path):
+    return path.endswith((".parquet", ".pq"))
+
+
+def read_chunks(path, chunk_size):
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    def __init__(self, path):
+        self.path = path
+        self._parquet = None
+        self._first = True
+
+    def write(self, df):
+        if _is_parquet(self.path):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first, index=False)
+        self._first = False
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+# ------------------------------------------------
+# DRIVER
+# ------------------------------------------------
+def score_file(input_path, output_path, model_path=None, chunk_size=100_000, workers=None):
+    """Score `input_path` into `output_path`; returns (rows, rejected_rows, seconds)."""
+    model_path = model_path or resolve_model_path()
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        executor = _InlineExecutor(model_path)
+    else:
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,))
+
+    writer = ChunkWriter(output_path)
+    pending = deque()
+    rows = rejected = 0
+    start = time.perf_counter()
+
+    def flush_one():
+        nonlocal rows, rejected
+        chunk, future = pending.popleft()
+        scores = future.result()
+        writer.write(chunk.assign(**{OUTPUT_COLUMN: scores}))
+        rows += len(chunk)
+        rejected += int(np.isnan(scores).sum())
+
+    try:
+        for chunk in read_chunks(input_path, chunk_size):
+            missing = [name for name in FEATURES if name not in chunk.columns]
+            if missing:
+                raise ValueError(f"{input_path} is missing feature columns {missing}")
+            X = chunk[FEATURES].to_numpy(dtype=np.float64, na_value=np.nan)
+            pending.append((chunk, executor.submit(score_features, X)))
+            # Keep a bounded window of chunks in flight
+            while len(pending) >= 2 * workers:
+                flush_one()
+        while pending:
+            flush_one()
+    finally:
+        writer.close()
+        executor.shutdown()
+
+    return rows, rejected, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of check-ins with the MoodFuel model")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--model", default=None, help="model artifact (default: same as the API)")
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    rows, rejected, seconds = score_file(args.input, args.output, args.model, args.chunk_size, args.workers)
+    print(f"Scored {rows:,} rows in {seconds:.2f}s ({rows / max(seconds, 1e-9):,.0f} rows/s) -> {args.output}",
+          file=sys.stderr)
+    if rejected:
+        print(f"{rejected:,} rows outside the API input domain were left blank", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# app/conformal.py
+# Split-conformal calibration of the forest's per-tree spread.
+import numpy as np
+
+
+def calibrate(engine, X, y, alpha=0.1, eps=0.05):
+    """Calibrate normalized conformal intervals on held-out (X, y).
+
+    Scores are |y - mean| / (std + eps) using the per-tree mean and std; q is
+    their finite-sample (1 - alpha) quantile, so mean +/- q * (std + eps)
+    covers at least 1 - alpha of new rows from the same distribution.
+    """
+    y = np.asarray(y, dtype=np.float64).ravel()
+    per_tree = engine.tree_predictions(X)
+    mean = per_tree.mean(axis=0, dtype=np.float64)
+    std = per_tree.std(axis=0, dtype=np.float64)
+    scores = np.abs(y - mean) / (std + eps)
+
+    n = len(scores)
+    level = min(1.0, np.ceil((n + 1) * (1 - alpha)) / n)
+    q = float(np.quantile(scores, level, method="higher"))
+    return {"alpha": float(alpha), "q": q, "eps": float(eps), "n": n}
+
+
+def coverage(engine, X, y):
+    """Fraction of rows whose true value falls inside the engine's interval."""
+    y = np.asarray(y, dtype=np.float64).ravel()
+    _, lower, upper, _ = engine.predict_interval(X)
+    return float(np.mean((y >= lower) & (y <= upper)))
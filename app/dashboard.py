@@ -3,8 +3,14 @@ import streamlit as st
 import requests
 import time
 import os
+import sys
 from datetime import datetime
 import json
+import uuid
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from app.history import HistoryStore  # noqa: E402
 
 # ------------------------------------------------
 # Configuration & Constants
@@ -95,6 +101,25 @@ def predict_coffee_strength(data, api_url=API_URL):
     except Exception as e:
         return None, f"Unexpected error: {str(e)}"
 
+def fetch_day_plan(data, api_url=API_URL):
+    """
+    Fetch the hour-by-hour strength curve for today in a single /plan call
+    """
+    plan_payload = {key: data[key] for key in ("sleep_hours", "stress_level", "workload_level")}
+    try:
+        response = requests.post(
+            f"{api_url.rstrip('/')}/plan",
+            json=plan_payload,
+            timeout=DEFAULT_TIMEOUT,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        return response.json(), None
+    except requests.exceptions.RequestException as e:
+        return None, f"Could not load today's plan: {str(e)}"
+    except ValueError as e:
+        return None, f"Invalid plan response: {str(e)}"
+
 # ------------------------------------------------
 # Helper Functions
 # ------------------------------------------------
@@ -132,11 +157,33 @@ def format_time_display(hour):
 # ------------------------------------------------
 if 'click_count' not in st.session_state:
     st.session_state.click_count = 0
-if 'saved_preferences' not in st.session_state:
-    st.session_state.saved_preferences = []
 if 'custom_api_url' not in st.session_state:
     st.session_state.custom_api_url = API_URL
 
+
+# Saved recommendations persist on disk (HISTORY_PATH) with bounded retention.
+# The store is shared by every visitor, so all reads and writes go through
+# this visitor's history id
+@st.cache_resource
+def get_history():
+    return HistoryStore()
+
+
+history = get_history()
+
+
+def history_user():
+    """This visitor's history id, kept in the URL so reloads and bookmarks keep the history."""
+    if "history" not in st.query_params:
+        st.query_params["history"] = uuid.uuid4().hex
+    return st.query_params["history"]
+
+
+def save_preference(payload, strength, category):
+    # Runs as a button callback, so it fires on the rerun the click triggers
+    history.add(history_user(), payload, strength, category)
+    st.toast("✅ Preference saved!")
+
 # ------------------------------------------------
 # 1️⃣ App Config with Enhanced Styling
 # ------------------------------------------------
@@ -690,6 +737,24 @@ if predict_button:
                     </div>
                     """, unsafe_allow_html=True)
                 
+                # Full-day curve from one /plan call
+                st.markdown("### 📈 Your Coffee Curve Today")
+                plan, plan_error = fetch_day_plan(payload, api_url_to_use)
+                if plan_error:
+                    st.info(plan_error)
+                else:
+                    st.line_chart(
+                        pd.DataFrame(
+                            {"Recommended strength": plan["recommended_strength"]},
+                            index=pd.Index(plan["hours"], name="Hour")
+                        )
+                    )
+                    cutoff = plan["cutoff_hour"]
+                    st.markdown(
+                        f"**☕ Best time for coffee:** {format_time_display(plan['best_hour'])} &nbsp;&nbsp; "
+                        f"**🛑 Switch to decaf after:** {format_time_display(cutoff) if cutoff is not None else 'now'}"
+                    )
+                
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # Action buttons
@@ -707,14 +772,8 @@ if predict_button:
                         st.rerun()
                         
                 with action_col3:
-                    if st.button("⭐ Save Preference", use_container_width=True, key="save_preference"):
-                        st.session_state.saved_preferences.append({
-                            "strength": recommended_strength,
-                            "category": category,
-                            "inputs": payload,
-                            "timestamp": datetime.now().isoformat()
-                        })
-                        st.success("✅ Preference saved!")
+                    st.button("⭐ Save Preference", use_container_width=True, key="save_preference",
+                              on_click=save_preference, args=(payload, recommended_strength, category))
                 
                 # Track clicks for easter egg
                 st.session_state.click_count += 1
@@ -769,3 +828,39 @@ with st.sidebar:
                 "workload_level": 6
             }
             # test_result
+
+    # Saved history, read from the incrementally maintained aggregates
+    st.markdown("---")
+    st.markdown("### 📚 Your Coffee History")
+    user = history_user()
+    summary = history.summary(user)
+    if summary["count"] == 0:
+        st.caption("Save a recommendation to start your history. Bookmark this page to come back to it.")
+    else:
+        daily = history.daily(user, days=30)
+        hist_col1, hist_col2 = st.columns(2)
+        hist_col1.metric("Saved", summary["count"])
+        recent_average = history.recent_average(user, 7)
+        hist_col2.metric("7-day average", recent_average if recent_average is not None else "—")
+
+        st.markdown("**By strength**")
+        st.bar_chart(pd.Series(
+            {info["name"]: summary["categories"].get(key, 0) for key, info in STRENGTH_CATEGORIES.items()},
+            name="Saved"
+        ))
+        st.markdown("**By time of day**")
+        st.bar_chart(pd.Series(
+            {hour: stats["count"] for hour, stats in summary["hours"].items()},
+            name="Saved"
+        ))
+        st.markdown("**Daily trend**")
+        if daily:
+            st.line_chart(pd.DataFrame(daily).set_index("day")[["average", "rolling_average"]])
+        else:
+            st.caption("No saves in the last 30 days.")
+
+        st.markdown("**Recent**")
+        for entry in history.recent(user, 5):
+            info = STRENGTH_CATEGORIES[entry["category"]]
+            st.caption(f"{info['emoji']} {entry['strength']} at {format_time_display(entry['time_of_day'])} "
+                       f"· {entry['timestamp'][:10]}")
@@ -0,0 +1,65 @@
+# app/distill.py
+# Distil a trained model into an AdditiveEngine surrogate: one lookup table per
+# feature, fitted to the teacher's predictions over the whole input grid.
+import itertools
+
+import numpy as np
+
+from app.engine import AdditiveEngine
+from app.schema import DOMAIN, FEATURES, STRENGTH_RANGE
+
+# Grid resolution per feature; integer features use every value
+GRID_STEP = {"sleep_hours": 0.1, "stress_level": 1, "time_of_day": 1, "workload_level": 1}
+
+
+def input_grid():
+    """Return (start, step, size) per feature and the full-factorial grid matrix."""
+    start = np.array([DOMAIN[name][0] for name in FEATURES], dtype=np.float64)
+    step = np.array([GRID_STEP[name] for name in FEATURES], dtype=np.float64)
+    stop = np.array([DOMAIN[name][1] for name in FEATURES], dtype=np.float64)
+    size = np.rint((stop - start) / step).astype(np.intp) + 1
+    axes = [start[j] + step[j] * np.arange(size[j]) for j in range(len(FEATURES))]
+    grid = np.array(list(itertools.product(*axes)), dtype=np.float64)
+    return start, step, size, grid
+
+
+def predict_in_chunks(engine, X, chunk_size=10_000):
+    return np.concatenate([engine.predict(X[i:i + chunk_size]) for i in range(0, len(X), chunk_size)])
+
+
+def distill(teacher, lower=STRENGTH_RANGE[0], upper=STRENGTH_RANGE[1]):
+    """Fit an AdditiveEngine to `teacher` (any engine from app.engine).
+
+    On a balanced full-factorial grid the least-squares additive fit is just
+    the main effects: each table entry is the mean teacher output at that
+    feature value, minus the grand mean.
+    """
+    start, step, size, grid = input_grid()
+    target = predict_in_chunks(teacher, grid)
+    bias = target.mean()
+
+    tables = []
+    for j in range(len(FEATURES)):
+        idx = np.rint((grid[:, j] - start[j]) / step[j]).astype(np.intp)
+        sums = np.bincount(idx, weights=target, minlength=size[j])
+        counts = np.bincount(idx, minlength=size[j])
+        tables.append(sums / counts - bias)
+
+    return AdditiveEngine(start, step, size, np.concatenate(tables), bias, lower, upper)
+
+
+def fidelity(surrogate, teacher, X, y=None):
+    """Agreement of the surrogate with the teacher (and the truth, if given) on held-out rows."""
+    X = np.asarray(X, dtype=np.float64)
+    teacher_pred = teacher.predict(X)
+    surrogate_pred = surrogate.predict(X)
+    diff = surrogate_pred - teacher_pred
+    report = {
+        "rmse_vs_teacher": float(np.sqrt(np.mean(diff ** 2))),
+        "max_abs_vs_teacher": float(np.abs(diff).max()),
+    }
+    if y is not None:
+        y = np.asarray(y, dtype=np.float64).ravel()
+        report["rmse_teacher"] = float(np.sqrt(np.mean((teacher_pred - y) ** 2)))
+        report["rmse_surrogate"] = float(np.sqrt(np.mean((surrogate_pred - y) ** 2)))
+    return report
@@ -0,0 +1,203 @@
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURES, STRENGTH_RANGE
+
+
+# ------------------------------------------------
+# SERVING ENGINES
+# ------------------------------------------------
+# Every engine takes an (n, 4) float matrix in FEATURES order and returns an
+# (n,) float64 array, so the API never needs to know which model is behind it.
+class SklearnEngine:
+    """Fallback that wraps a fitted scikit-learn estimator as-is."""
+
+    name = "sklearn"
+
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, X):
+        return np.asarray(self.model.predict(pd.DataFrame(X, columns=FEATURES)), dtype=np.float64)
+
+
+class LinearEngine:
+    name = "linear"
+
+    def __init__(self, coef, intercept):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def explain(self, X):
+        """Return (baseline, contributions) with baseline + contributions.sum(1) == predict(X)."""
+        contributions = np.asarray(X, dtype=np.float64) * self.coef
+        return np.full(len(contributions), self.intercept), contributions
+
+
+def tree_mean(per_tree):
+    """Mean of (n_trees, n) tree outputs, summed in tree order like scikit-learn.
+
+    Forest means often sit on x.xx5, so a different summation order can round
+    to a different 2 decimals. Reducing axis 0 already adds row by row, except
+    for a single column, which NumPy sums pairwise.
+    """
+    total = per_tree.cumsum(axis=0)[-1] if per_tree.shape[1] == 1 else per_tree.sum(axis=0)
+    return total / len(per_tree)
+
+
+class TreeEnsembleEngine:
+    """Evaluates every tree of a forest at once with NumPy gathers.
+
+    All trees share flat node arrays. Leaves point at themselves, so walking
+    `depth` steps from the roots always ends on a leaf without masking.
+    """
+
+    name = "trees"
+    block_size = 1024
+    calibration = None
+    interval_alpha = 0.1
+
+    def __init__(self, roots, feature, threshold, left, right, value, depth):
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        # children[2 * node + go_right] is the next node
+        self.children = np.stack([left, right], axis=1).astype(np.intp).ravel()
+        self.value = np.asarray(value, dtype=np.float64)
+        self.depth = int(depth)
+        # Built at load time (off the request path) so ?explain=true stays a gather
+        self.path_contributions = self.build_path_contributions()
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def leaves(self, X):
+        """Return the (n_trees, n) leaf index reached by each row in each tree."""
+        # scikit-learn compares float32 inputs against its split thresholds
+        X = np.asarray(X, dtype=np.float32)
+        n = len(X)
+        if n == 1:
+            row, idx = X[0], self.roots
+            for _ in range(self.depth):
+                idx = self.children[2 * idx + (row[self.feature[idx]] > self.threshold[idx])]
+            return idx[:, None]
+        columns = np.ascontiguousarray(X.T).ravel()
+        feature_offset = self.feature * n
+        rows = np.tile(np.arange(n), self.n_trees)
+        idx = np.repeat(self.roots, n)
+        for _ in range(self.depth):
+            go_right = columns[feature_offset[idx] + rows] > self.threshold[idx]
+            idx = self.children[2 * idx + go_right]
+        return idx.reshape(self.n_trees, n)
+
+    def predict(self, X):
+        # Walk large inputs in blocks so the per-tree index arrays stay cache-sized
+        X = np.asarray(X, dtype=np.float32)
+        out = np.empty(len(X), dtype=np.float64)
+        for i in range(0, len(X), self.block_size):
+            leaves = self.leaves(X[i:i + self.block_size])
+            out[i:i + self.block_size] = tree_mean(self.value[leaves])
+        return out
+
+    def build_path_contributions(self):
+        """(n_nodes, 4) sum of value changes per split feature from the root to each node.
+
+        Built level by level from the stored node values; a row's
+        decision-path explanation is then one gather at its leaves.
+        """
+        contributions = np.zeros((len(self.value), len(FEATURES)), dtype=np.float64)
+        frontier = self.roots
+        for _ in range(self.depth):
+            parents = frontier[self.children[2 * frontier] != frontier]
+            frontier = []
+            for side in (0, 1):
+                kids = self.children[2 * parents + side]
+                contributions[kids] = contributions[parents]
+                contributions[kids, self.feature[parents]] += self.value[kids] - self.value[parents]
+                frontier.append(kids)
+            frontier = np.concatenate(frontier)
+        return contributions
+
+    def explain(self, X):
+        """Return (baseline, contributions) with baseline + contributions.sum(1) == predict(X)."""
+        X = np.asarray(X, dtype=np.float32)
+        contributions = np.empty((len(X), len(FEATURES)), dtype=np.float64)
+        for i in range(0, len(X), self.block_size):
+            leaves = self.leaves(X[i:i + self.block_size])
+            contributions[i:i + self.block_size] = self.path_contributions[leaves].mean(axis=0)
+        baseline = self.value[self.roots].mean()
+        return np.full(len(X), baseline), contributions
+
+    def tree_predictions(self, X):
+        """Return the (n_trees, n) output of every tree."""
+        X = np.asarray(X, dtype=np.float32)
+        blocks = [self.value[self.leaves(X[i:i + self.block_size])] for i in range(0, len(X), self.block_size)]
+        return np.concatenate(blocks, axis=1)
+
+    def predict_interval(self, X):
+        """Return (mean, lower, upper, std) per row from one pass over all trees.
+
+        With conformal calibration (app/conformal.py) the band is
+        mean +/- q * (std + eps); otherwise it is the central 1 - alpha range
+        of the per-tree predictions.
+        """
+        per_tree = self.tree_predictions(X)
+        mean = tree_mean(per_tree)
+        std = per_tree.std(axis=0)
+        if self.calibration is not None:
+            half = self.calibration["q"] * (std + self.calibration["eps"])
+            lower, upper = mean - half, mean + half
+        else:
+            alpha = self.interval_alpha
+            lower, upper = np.quantile(per_tree, [alpha / 2, 1 - alpha / 2], axis=0)
+        return mean, np.clip(lower, *STRENGTH_RANGE), np.clip(upper, *STRENGTH_RANGE), std
+
+
+class AdditiveEngine:
+    """Sum of one lookup table per feature, clipped to the target range.
+
+    Each feature is snapped to a regular grid (start + k * step); a prediction
+    is a handful of array lookups, so latency is close to plain arithmetic.
+    """
+
+    name = "additive"
+
+    def __init__(self, start, step, size, tables, bias, lower, upper):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.step = np.asarray(step, dtype=np.float64)
+        self.size = np.asarray(size, dtype=np.intp)
+        self.tables = np.asarray(tables, dtype=np.float64)
+        self.offsets = np.concatenate([[0], np.cumsum(self.size)[:-1]])
+        self.bias = float(bias)
+        self.lower = float(lower)
+        self.upper = float(upper)
+        # Plain-Python copies for the single-row path, where NumPy call overhead dominates
+        self._axes = list(zip(self.start.tolist(), self.step.tolist(), (self.size - 1).tolist(), self.offsets.tolist()))
+        self._table_list = self.tables.tolist()
+
+    def bins(self, X):
+        """Return the (n, 4) flat table index of each row's feature values."""
+        idx = np.rint((np.asarray(X, dtype=np.float64) - self.start) / self.step).astype(np.intp)
+        return np.clip(idx, 0, self.size - 1) + self.offsets
+
+    def predict_row(self, row):
+        total = self.bias
+        for value, (start, step, last, offset) in zip(row, self._axes):
+            k = min(max(round((value - start) / step), 0), last)
+            total += self._table_list[offset + k]
+        return min(max(total, self.lower), self.upper)
+
+    def explain(self, X):
+        """Return (baseline, contributions); the sum matches predict(X) before clipping."""
+        contributions = self.tables[self.bins(X)]
+        return np.full(len(contributions), self.bias), contributions
+
+    def predict(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 1:
+            return np.array([self.predict_row(X[0].tolist())])
+        return np.clip(self.bias + self.tables[self.bins(X)].sum(axis=1), self.lower, self.upper)
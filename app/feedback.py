@@ -0,0 +1,34 @@
+# app/feedback.py
+# Append-only store of user feedback, in the same column layout as the
+# training CSV so app/retrain.py can train on it directly.
+import csv
+import os
+import threading
+from datetime import datetime, timezone
+
+from app.schema import FEATURES
+
+FEEDBACK_PATH = os.getenv("FEEDBACK_PATH", "data/feedback.csv")
+FEEDBACK_COLUMNS = FEATURES + ["coffee_strength", "predicted_strength", "model_version", "timestamp", "user_id"]
+
+
+class FeedbackStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record):
+        """Append one feedback row and return the log's byte length just after it.
+
+        `record` holds FEEDBACK_COLUMNS except the timestamp.
+        """
+        row = {**record, "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            is_new = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=FEEDBACK_COLUMNS, extrasaction="ignore")
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(row)
+                return f.tell()
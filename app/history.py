@@ -0,0 +1,166 @@
+# app/history.py
+# Persistent recommendation history for the dashboard: an embedded SQLite file
+# keeping the last `max_rows` entries of each user. Triggers maintain
+# per-user category, hour and day aggregates on every insert and every
+# retention delete, so summary views read a handful of small table rows
+# however long the history is.
+import os
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+HISTORY_PATH = os.getenv("HISTORY_PATH", "data/history.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    day TEXT NOT NULL,
+    sleep_hours REAL NOT NULL,
+    stress_level INTEGER NOT NULL,
+    time_of_day INTEGER NOT NULL,
+    workload_level INTEGER NOT NULL,
+    strength REAL NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_user ON history (user_id, id);
+CREATE TABLE IF NOT EXISTS category_counts (
+    user_id TEXT NOT NULL, category TEXT NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (user_id, category)
+);
+CREATE TABLE IF NOT EXISTS hour_stats (
+    user_id TEXT NOT NULL, hour INTEGER NOT NULL, count INTEGER NOT NULL, strength_sum REAL NOT NULL,
+    PRIMARY KEY (user_id, hour)
+);
+CREATE TABLE IF NOT EXISTS day_stats (
+    user_id TEXT NOT NULL, day TEXT NOT NULL, count INTEGER NOT NULL, strength_sum REAL NOT NULL,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE TRIGGER IF NOT EXISTS history_added AFTER INSERT ON history BEGIN
+    INSERT INTO category_counts VALUES (NEW.user_id, NEW.category, 1)
+        ON CONFLICT(user_id, category) DO UPDATE SET count = count + 1;
+    INSERT INTO hour_stats VALUES (NEW.user_id, NEW.time_of_day, 1, NEW.strength)
+        ON CONFLICT(user_id, hour) DO UPDATE SET count = count + 1, strength_sum = strength_sum + NEW.strength;
+    INSERT INTO day_stats VALUES (NEW.user_id, NEW.day, 1, NEW.strength)
+        ON CONFLICT(user_id, day) DO UPDATE SET count = count + 1, strength_sum = strength_sum + NEW.strength;
+END;
+
+CREATE TRIGGER IF NOT EXISTS history_expired AFTER DELETE ON history BEGIN
+    UPDATE category_counts SET count = count - 1 WHERE user_id = OLD.user_id AND category = OLD.category;
+    UPDATE hour_stats SET count = count - 1, strength_sum = strength_sum - OLD.strength
+        WHERE user_id = OLD.user_id AND hour = OLD.time_of_day;
+    UPDATE day_stats SET count = count - 1, strength_sum = strength_sum - OLD.strength
+        WHERE user_id = OLD.user_id AND day = OLD.day;
+    DELETE FROM category_counts WHERE user_id = OLD.user_id AND count <= 0;
+    DELETE FROM hour_stats WHERE user_id = OLD.user_id AND count <= 0;
+    DELETE FROM day_stats WHERE user_id = OLD.user_id AND count <= 0;
+END;
+"""
+
+
+class HistoryStore:
+    """Saved recommendations per user, each capped at their most recent `max_rows`.
+
+    Every query is scoped to one `user_id`, so visitors never see each other's saves.
+    """
+
+    def __init__(self, path=HISTORY_PATH, max_rows=10_000):
+        self.max_rows = max_rows
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        # Streamlit reruns the script on different threads; one lock serializes access
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def add(self, user_id, inputs, strength, category, timestamp=None):
+        """Record one recommendation; drops the user's entries past the retention limit."""
+        timestamp = timestamp or datetime.now()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO history (user_id, timestamp, day, sleep_hours, stress_level, time_of_day, "
+                "workload_level, strength, category) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (user_id, timestamp.isoformat(timespec="seconds"), timestamp.date().isoformat(),
+                 inputs["sleep_hours"], inputs["stress_level"], inputs["time_of_day"], inputs["workload_level"],
+                 strength, category),
+            )
+            # The aggregates give the user's row count without scanning their history
+            (count,) = self.conn.execute(
+                "SELECT SUM(count) FROM category_counts WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            if count > self.max_rows:
+                self.conn.execute(
+                    "DELETE FROM history WHERE id IN "
+                    "(SELECT id FROM history WHERE user_id = ? ORDER BY id LIMIT ?)",
+                    (user_id, count - self.max_rows),
+                )
+
+    def recent(self, user_id, limit=10):
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT timestamp, sleep_hours, stress_level, time_of_day, workload_level, strength, category "
+                "FROM history WHERE user_id = ? ORDER BY id DESC LIMIT ?", (user_id, limit),
+            ).fetchall()
+        keys = ["timestamp", "sleep_hours", "stress_level", "time_of_day", "workload_level", "strength", "category"]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def summary(self, user_id):
+        """Counts per category and count/average strength per hour of day."""
+        with self._lock:
+            categories = dict(self.conn.execute(
+                "SELECT category, count FROM category_counts WHERE user_id = ?", (user_id,)
+            ))
+            hours = self.conn.execute(
+                "SELECT hour, count, strength_sum FROM hour_stats WHERE user_id = ? ORDER BY hour", (user_id,)
+            ).fetchall()
+        count = sum(categories.values())
+        total = sum(strength_sum for _, _, strength_sum in hours)
+        return {
+            "count": count,
+            "average": round(total / count, 2) if count else None,
+            "categories": categories,
+            "hours": {hour: {"count": n, "average": round(s / n, 2)} for hour, n, s in hours},
+        }
+
+    def daily(self, user_id, days=30, window=7, today=None):
+        """Per-day average strength for days with entries among the last `days` calendar days.
+
+        rolling_average covers the `window` calendar days ending at that day,
+        so gaps without entries shorten the window rather than stretching it.
+        """
+        today = today or date.today()
+        since = today - timedelta(days=days + window - 2)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT day, count, strength_sum FROM day_stats WHERE user_id = ? AND day >= ? AND day <= ? "
+                "ORDER BY day",
+                (user_id, since.isoformat(), today.isoformat()),
+            ).fetchall()
+        first_shown = (today - timedelta(days=days - 1)).isoformat()
+        out = []
+        for i, (day, count, strength_sum) in enumerate(rows):
+            if day < first_shown:
+                continue
+            window_start = (date.fromisoformat(day) - timedelta(days=window - 1)).isoformat()
+            span = [row for row in rows[:i + 1] if row[0] >= window_start]
+            out.append({
+                "day": day,
+                "count": count,
+                "average": round(strength_sum / count, 2),
+                "rolling_average": round(sum(s for _, _, s in span) / sum(n for _, n, _ in span), 2),
+            })
+        return out
+
+    def recent_average(self, user_id, window=7, today=None):
+        """Average strength over the last `window` calendar days, or None without entries."""
+        today = today or date.today()
+        since = today - timedelta(days=window - 1)
+        with self._lock:
+            count, total = self.conn.execute(
+                "SELECT SUM(count), SUM(strength_sum) FROM day_stats WHERE user_id = ? AND day >= ? AND day <= ?",
+                (user_id, since.isoformat(), today.isoformat()),
+            ).fetchone()
+        return round(total / count, 2) if count else None
@@ -0,0 +1,211 @@
+# app/limits.py
+# Per-client token-bucket rate limiting and latency-based load shedding,
+# as a plain ASGI middleware so the fast path stays a few dict operations.
+import ipaddress
+import json
+import math
+import time
+from collections import OrderedDict
+
+# Routes are shed in this order as latency climbs past the SLO; anything not
+# listed is high priority (health checks, metrics) and never shed. The SLO is
+# tracked on normal-priority (single prediction) HTTP requests only, since
+# batch and plan calls are expected to be slower. WebSocket routes are
+# admitted once, when the connection is opened.
+ROUTE_PRIORITY = {
+    "/predict/batch": "low",
+    "/plan": "low",
+    "/predict": "normal",
+    "/ws/predict": "normal",
+}
+
+# Close codes for refused WebSocket handshakes: 1008 = policy violation
+# (rate limited), 1013 = try again later (shed)
+WEBSOCKET_CLOSE_CODES = {429: 1008, 503: 1013}
+
+
+class TokenBucketLimiter:
+    """`rate` requests/s per key with bursts up to `burst`.
+
+    Buckets live in an OrderedDict ordered by last use, so each check is O(1)
+    and idle buckets are evicted from the front without scanning. Past
+    `max_buckets` the least recently used bucket is dropped too, so memory
+    stays bounded however many distinct clients show up.
+    """
+
+    def __init__(self, rate, burst, idle_seconds=300.0, max_buckets=100_000, clock=time.monotonic):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.idle_seconds = idle_seconds
+        self.max_buckets = max_buckets
+        self.clock = clock
+        self.buckets = OrderedDict()
+
+    def allow(self, key):
+        """Return (allowed, retry_after_seconds) and spend a token if allowed."""
+        now = self.clock()
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [self.burst, now]
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        self.evict(now)
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return True, 0.0
+        return False, (1 - bucket[0]) / self.rate
+
+    def evict(self, now):
+        while self.buckets:
+            key, (_, last_seen) = next(iter(self.buckets.items()))
+            if now - last_seen < self.idle_seconds and len(self.buckets) <= self.max_buckets:
+                break
+            del self.buckets[key]
+
+
+class LoadShedder:
+    """Sheds by priority once the request latency average passes the SLO.
+
+    Above the SLO low-priority routes are refused; above twice the SLO normal
+    ones are too. The average also halves every `half_life` seconds without
+    new samples, so shedding lifts even if everything sheddable was refused.
+    """
+
+    def __init__(self, slo_seconds, smoothing=0.2, half_life=1.0, clock=time.monotonic):
+        self.slo = slo_seconds
+        self.smoothing = smoothing
+        self.half_life = half_life
+        self.clock = clock
+        self._latency = 0.0
+        self._updated = clock()
+
+    @property
+    def latency(self):
+        return self._latency * 0.5 ** ((self.clock() - self._updated) / self.half_life)
+
+    def observe(self, seconds):
+        latency = self.latency
+        self._latency = latency + self.smoothing * (seconds - latency)
+        self._updated = self.clock()
+
+    def should_shed(self, priority):
+        if priority == "low":
+            return self.latency > self.slo
+        if priority == "normal":
+            return self.latency > 2 * self.slo
+        return False
+
+
+class AdmissionControl:
+    """Rate limiter + load shedder + decision counters shared with /metrics.
+
+    Clients are keyed by API key when it is one of `api_keys`, otherwise by IP.
+    The IP is the direct peer unless that peer is a trusted proxy (an address
+    or network in `trusted_proxies`, or "*" for any peer), in which case it is
+    the rightmost untrusted X-Forwarded-For hop, the one the proxy itself saw.
+    """
+
+    def __init__(self, limiter=None, shedder=None, api_keys=(), trusted_proxies=()):
+        self.limiter = limiter
+        self.shedder = shedder
+        self.api_keys = frozenset(api_keys)
+        self.trust_any_peer = "*" in trusted_proxies
+        self.trusted_networks = [ipaddress.ip_network(proxy, strict=False)
+                                 for proxy in trusted_proxies if proxy != "*"]
+        self.counters = {"allowed": 0, "rate_limited": 0, "shed_low": 0, "shed_normal": 0}
+
+    def is_trusted(self, address):
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.trusted_networks)
+
+    def client_key(self, scope):
+        forwarded = []
+        for name, value in scope["headers"]:
+            if name == b"x-api-key":
+                key = value.decode("latin-1")
+                # Unknown keys fall through to the IP, so minting keys buys nothing
+                if key in self.api_keys:
+                    return "key:" + key
+            elif name == b"x-forwarded-for":
+                forwarded.extend(hop.strip() for hop in value.decode("latin-1").split(","))
+
+        client = scope.get("client")
+        peer = client[0] if client else "unknown"
+        if not (self.trust_any_peer or self.is_trusted(peer)):
+            return "ip:" + peer
+        for hop in reversed(forwarded):
+            if hop and not self.is_trusted(hop):
+                return "ip:" + hop
+        return "ip:" + (forwarded[0] if forwarded and forwarded[0] else peer)
+
+    def admit(self, key, priority):
+        """Return None to serve the request, else (status, detail, retry_after)."""
+        if self.shedder is not None and self.shedder.should_shed(priority):
+            self.counters[f"shed_{priority}"] += 1
+            return 503, "Server overloaded, please retry shortly", 1.0
+        if self.limiter is not None:
+            allowed, retry_after = self.limiter.allow(key)
+            if not allowed:
+                self.counters["rate_limited"] += 1
+                return 429, "Too many requests", retry_after
+        self.counters["allowed"] += 1
+        return None
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "active_buckets": len(self.limiter.buckets) if self.limiter is not None else 0,
+            "latency_ewma_ms": round(self.shedder.latency * 1e3, 3) if self.shedder is not None else None,
+        }
+
+
+class RateLimitMiddleware:
+    def __init__(self, app, control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            return await self.app(scope, receive, send)
+
+        priority = ROUTE_PRIORITY.get(scope["path"], "high")
+        rejection = self.control.admit(self.control.client_key(scope), priority)
+        if rejection is not None:
+            if scope["type"] == "websocket":
+                return await self.reject_websocket(send, *rejection)
+            return await self.reject(send, *rejection)
+
+        shedder = self.control.shedder
+        # A WebSocket's duration is the connection's lifetime, not a latency sample
+        if shedder is None or priority != "normal" or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            shedder.observe(time.perf_counter() - start)
+
+    @staticmethod
+    async def reject(send, status, detail, retry_after):
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def reject_websocket(send, status, detail, retry_after):
+        # Closing before the handshake is accepted refuses the connection (HTTP 403)
+        await send({"type": "websocket.close", "code": WEBSOCKET_CLOSE_CODES[status], "reason": detail})
@@ -1,16 +1,72 @@
-from fastapi import FastAPI, Request
-import joblib
-import pandas as pd
-from app.schema import MoodInput
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, RedirectResponse, Response
+from contextlib import asynccontextmanager
+from functools import lru_cache
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import numpy as np
+import orjson
+from pydantic import ValidationError
+from app.artifact import load_engine, model_version, resolve_model_path
+from app.feedback import FEEDBACK_PATH, FeedbackStore
+from app.limits import AdmissionControl, LoadShedder, RateLimitMiddleware, TokenBucketLimiter
+from app.personalization import USER_STORE_PATH, UserCalibrationStore
+from app.profiling import ProfilingMiddleware, SamplingProfiler, Tracer, span
+from app.responses import MSGPACK_MEDIA_TYPE, ORJSONResponse, negotiate
+from app.schema import (
+    DOMAIN, FEATURES, STRENGTH_RANGE, BatchPredictionResponse, FeedbackInput, MoodBatch, MoodInput, PlanInput, PlanResponse, PredictionResponse,
+    StreamUpdate, round_strength,
+)
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime
 from sqlalchemy import create_engine, Column, String, DateTime, Integer
 from sqlalchemy.orm import sessionmaker, declarative_base
 
+logger = logging.getLogger(__name__)
+
 # ------------------------------------------------
 # APP SETUP
 # ------------------------------------------------
-app = FastAPI(title="MoodFuel: Smart coffee Strength Recommender")
+@asynccontextmanager
+async def lifespan(app):
+    watcher = asyncio.create_task(watch_model_file()) if MODEL_RELOAD_SECONDS > 0 else None
+    yield
+    if watcher is not None:
+        watcher.cancel()
+
+
+app = FastAPI(
+    title="MoodFuel: Smart coffee Strength Recommender",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
+
+# Per-client rate limiting (off unless RATE_LIMIT_RPS > 0) and load shedding,
+# see app/limits.py and the README. Behind a reverse proxy, list it in
+# RATE_LIMIT_TRUSTED_PROXIES or every client shares the proxy's bucket.
+RATE_LIMIT_RPS = float(os.getenv("RATE_LIMIT_RPS", "0"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+RATE_LIMIT_API_KEYS = [key for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key]
+RATE_LIMIT_TRUSTED_PROXIES = [p.strip() for p in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",") if p.strip()]
+SHED_LATENCY_SLO_MS = float(os.getenv("SHED_LATENCY_SLO_MS", "250"))
+admission = AdmissionControl(
+    limiter=TokenBucketLimiter(RATE_LIMIT_RPS, RATE_LIMIT_BURST, max_buckets=RATE_LIMIT_MAX_CLIENTS)
+    if RATE_LIMIT_RPS > 0 else None,
+    shedder=LoadShedder(SHED_LATENCY_SLO_MS / 1000) if SHED_LATENCY_SLO_MS > 0 else None,
+    api_keys=RATE_LIMIT_API_KEYS,
+    trusted_proxies=RATE_LIMIT_TRUSTED_PROXIES,
+)
+# Admin diagnostics (app/profiling.py): the /admin routes 404 unless ADMIN_TOKEN
+# is set, and TRACE_SAMPLE_RATE (0 by default) is the fraction of requests traced
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+profiler = SamplingProfiler()
+tracer = Tracer(float(os.getenv("TRACE_SAMPLE_RATE", "0")))
+app.add_middleware(ProfilingMiddleware, profiler=profiler, tracer=tracer)
+app.add_middleware(RateLimitMiddleware, control=admission)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,7 +79,71 @@ app.add_middleware(
 # ------------------------------------------------
 # MODEL
 # ------------------------------------------------
-model = joblib.load("model/model.pkl")
+# See app/artifact.py for MODEL_ENGINE / MODEL_PATH
+MODEL_PATH = resolve_model_path()
+engine = load_engine(MODEL_PATH)
+MODEL_VERSION = model_version(MODEL_PATH)
+MODEL_MTIME = os.path.getmtime(MODEL_PATH)
+
+# app/retrain.py promotes new models by replacing the file; pick them up
+MODEL_RELOAD_SECONDS = float(os.getenv("MODEL_RELOAD_SECONDS", "10"))
+
+
+def reload_model_if_changed():
+    global engine, MODEL_VERSION, MODEL_MTIME
+    mtime = os.path.getmtime(MODEL_PATH)
+    if mtime == MODEL_MTIME:
+        return False
+    new_engine, new_version = load_engine(MODEL_PATH), model_version(MODEL_PATH)
+    # Plans and explanations are keyed by MODEL_VERSION, so nothing needs clearing.
+    # The engine is swapped first: a request that reads the new version always
+    # gets the new engine, and entries under the old version simply age out
+    engine, MODEL_VERSION, MODEL_MTIME = new_engine, new_version, mtime
+    return True
+
+
+async def watch_model_file():
+    while True:
+        await asyncio.sleep(MODEL_RELOAD_SECONDS)
+        try:
+            await asyncio.to_thread(reload_model_if_changed)
+            await asyncio.to_thread(user_store.reload)
+        except Exception:
+            # Unreadable file (e.g. a truncated .npz raises BadZipFile); keep
+            # serving the current model and try again on the next tick
+            logger.warning("Model reload failed", exc_info=True)
+
+
+feedback_store = FeedbackStore(FEEDBACK_PATH)
+# Per-user corrections: rebuilt by app/retrain.py, updated live by /feedback
+user_store = UserCalibrationStore(
+    USER_STORE_PATH,
+    max_warm=int(os.getenv("USER_WARM_SIZE", "100000")),
+    max_pending=int(os.getenv("USER_PENDING_SIZE", "1000000")),
+)
+
+
+@lru_cache(maxsize=4096)
+def build_plan(version, sleep_hours, stress_level, workload_level, start_hour, end_hour, cutoff_strength):
+    """Predict every hour of the day in one call.
+
+    best_hour is the hour with the strongest recommendation; cutoff_hour is the
+    last hour still recommending more than cutoff_strength (None if none does).
+    `version` is the MODEL_VERSION the caller saw; it only keys the cache.
+    """
+    hours = np.arange(start_hour, end_hour + 1)
+    X = np.empty((len(hours), 4))
+    X[:] = [sleep_hours, stress_level, 0, workload_level]
+    X[:, 2] = hours
+    with span("model"):
+        strengths = round_strength(engine.predict(X))
+    above = np.flatnonzero(strengths > cutoff_strength)
+    return {
+        "hours": hours.tolist(),
+        "recommended_strength": strengths.tolist(),
+        "best_hour": int(hours[np.argmax(strengths)]),
+        "cutoff_hour": int(hours[above[-1]]) if len(above) else None,
+    }
 
 
 
@@ -41,10 +161,257 @@ def health_check():
     return {"status": "healthy"}
 
 
-@app.post("/predict")
-def predict_strength(data: MoodInput):
-    input_data = pd.DataFrame([data.model_dump()])
-    prediction = model.predict(input_data)[0]
-    return {"recommended_strength": round(float(prediction), 2)}
+@app.get("/metrics")
+def metrics():
+    return {"limiter": admission.metrics()}
+
+
+def predict_one(data):
+    with span("model"):
+        return float(round_strength(engine.predict(data.to_array())[0]))
+
+
+def predict_with_interval(X):
+    """Predictions plus lower/upper/std bands, rounded like recommended_strength."""
+    if not hasattr(engine, "predict_interval"):
+        raise HTTPException(status_code=400, detail=f"Prediction intervals need a forest model, not {engine.name!r}")
+    with span("model"):
+        mean, lower, upper, std = engine.predict_interval(X)
+    return {
+        "recommended_strength": round_strength(mean),
+        "lower": round_strength(lower),
+        "upper": round_strength(upper),
+        "std": np.round(std, 3),
+    }
+
+
+def personalize(result, user_id):
+    """Shift a single prediction (and its band) by the user's learned correction."""
+    if user_id is None:
+        return result
+    offset = user_store.offset(user_id)
+    if offset:
+        for key in ("recommended_strength", "lower", "upper"):
+            if key in result:
+                result[key] = float(round_strength(np.clip(result[key] + offset, *STRENGTH_RANGE)))
+    result["personal_offset"] = round(offset, 3)
+    return result
+
+
+@lru_cache(maxsize=4096)
+def explain_row(version, *row):
+    """Per-feature contributions for one input tuple, memoized per MODEL_VERSION."""
+    baseline, contributions = engine.explain(np.array([row]))
+    return {
+        "baseline": round(float(baseline[0]), 3),
+        "contributions": {name: round(float(value), 3) for name, value in zip(FEATURES, contributions[0])},
+    }
+
+
+@app.post("/predict", response_model=PredictionResponse)
+def predict_strength(data: MoodInput, request: Request, interval: bool = False, explain: bool = False):
+    if interval:
+        result = {key: float(values[0]) for key, values in predict_with_interval(data.to_array()).items()}
+    else:
+        result = {"recommended_strength": predict_one(data)}
+    if explain:
+        if not hasattr(engine, "explain"):
+            raise HTTPException(status_code=400, detail=f"Explanations are not available for {engine.name!r}")
+        with span("explain"):
+            result["explanation"] = explain_row(MODEL_VERSION, *data.to_array()[0].tolist())
+    return negotiate(request, personalize(result, data.user_id))
+
+
+@app.post("/feedback")
+def record_feedback(data: FeedbackInput):
+    log_offset = feedback_store.append({
+        **data.model_dump(include=set(FEATURES) | {"user_id"}),
+        "coffee_strength": data.preferred_strength,
+        "predicted_strength": data.predicted_strength,
+        "model_version": MODEL_VERSION,
+    })
+    if data.user_id is not None:
+        # Residual against the global model, whatever the client was shown
+        residual = data.preferred_strength - float(engine.predict(data.to_array())[0])
+        user_store.update(data.user_id, residual, log_offset)
+    return {"status": "recorded"}
+
+
+# ------------------------------------------------
+# CACHEABLE GET
+# ------------------------------------------------
+PREDICT_CACHE_CONTROL = f"public, max-age={int(os.getenv('PREDICT_CACHE_MAX_AGE', '3600'))}"
+
+
+def canonical_query(sleep_hours, stress_level, time_of_day, workload_level):
+    """One query string per input, so every cache keys the same request identically."""
+    return (f"sleep_hours={float(sleep_hours)!r}&stress_level={int(stress_level)}"
+            f"&time_of_day={int(time_of_day)}&workload_level={int(workload_level)}")
+
+
+def prediction_etag(canonical, media_type):
+    digest = hashlib.blake2b(f"{MODEL_VERSION}|{media_type}|{canonical}".encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+@app.get("/predict", response_model=PredictionResponse)
+def predict_strength_cached(
+    request: Request,
+    sleep_hours: float = Query(ge=DOMAIN["sleep_hours"][0], le=DOMAIN["sleep_hours"][1]),
+    stress_level: int = Query(ge=DOMAIN["stress_level"][0], le=DOMAIN["stress_level"][1]),
+    time_of_day: int = Query(ge=DOMAIN["time_of_day"][0], le=DOMAIN["time_of_day"][1]),
+    workload_level: int = Query(ge=DOMAIN["workload_level"][0], le=DOMAIN["workload_level"][1]),
+):
+    """Same prediction as POST /predict, cacheable by browsers, proxies and CDNs.
+
+    Non-canonical query strings redirect to the canonical one; the strong ETag
+    covers the model version, representation and inputs, so If-None-Match
+    revalidation answers 304 without running the model.
+    """
+    canonical = canonical_query(sleep_hours, stress_level, time_of_day, workload_level)
+    headers = {"Cache-Control": PREDICT_CACHE_CONTROL, "Vary": "Accept"}
+    if request.url.query != canonical:
+        return RedirectResponse(f"{request.url.path}?{canonical}", status_code=301, headers=headers)
+
+    media_type = MSGPACK_MEDIA_TYPE if MSGPACK_MEDIA_TYPE in request.headers.get("accept", "") else "json"
+    headers["ETag"] = prediction_etag(canonical, media_type)
+    headers["X-Model-Version"] = MODEL_VERSION
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    prediction = engine.predict(np.array([[sleep_hours, stress_level, time_of_day, workload_level]]))[0]
+    response = negotiate(request, {"recommended_strength": float(round_strength(prediction))})
+    response.headers.update(headers)
+    return response
+
+
+@app.post("/predict/batch", response_model=BatchPredictionResponse)
+def predict_batch(data: MoodBatch, request: Request, interval: bool = False):
+    if interval:
+        result = predict_with_interval(data.to_array())
+        return negotiate(request, {key: values.tolist() for key, values in result.items()})
+    with span("model"):
+        predictions = round_strength(engine.predict(data.to_array()))
+    return negotiate(request, {"recommended_strength": predictions.tolist()})
+
+
+@app.post("/plan", response_model=PlanResponse)
+def plan_day(data: PlanInput, request: Request):
+    return negotiate(request, build_plan(MODEL_VERSION, *data.key()))
+
+
+# ------------------------------------------------
+# ADMIN DIAGNOSTICS
+# ------------------------------------------------
+def require_admin(x_admin_token: str = Header(default="")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.get("/admin/profile", include_in_schema=False, dependencies=[Depends(require_admin)])
+async def profile(
+    requests: int = Query(default=100, ge=1),
+    seconds: float = Query(default=30, gt=0, le=300),
+    interval_ms: float = Query(default=5, ge=1, le=100),
+    include_idle: bool = False,
+):
+    """Profile the next `requests` requests or `seconds`, whichever ends first.
+
+    Returns collapsed stacks; feed them to flamegraph.pl or speedscope.
+    """
+    try:
+        profiler.start(max_requests=requests, seconds=seconds, interval=interval_ms / 1000, include_idle=include_idle)
+    except RuntimeError:
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    while profiler.active:
+        await asyncio.sleep(0.05)
+    return PlainTextResponse(profiler.collapsed(), headers={"X-Profile-Samples": str(profiler.samples)})
+
+
+@app.get("/admin/traces", include_in_schema=False, dependencies=[Depends(require_admin)])
+def recent_traces(limit: int = Query(default=50, ge=1, le=1000)):
+    traces = list(tracer.traces)[-limit:]
+    return {"sample_rate": tracer.rate, "traces": [trace.to_dict() for trace in reversed(traces)]}
+
+
+# ------------------------------------------------
+# STREAMING
+# ------------------------------------------------
+# Updates arriving within this window of each other are coalesced into one prediction
+WS_DEBOUNCE_SECONDS = float(os.getenv("WS_DEBOUNCE_MS", "30")) / 1000
+
+
+def stream_result(message, coalesced):
+    try:
+        update = StreamUpdate.model_validate_json(message)
+    except ValidationError as e:
+        return {"error": e.errors(include_url=False, include_context=False, include_input=False)}
+    result = personalize({"recommended_strength": predict_one(update)}, update.user_id)
+    return {"seq": update.seq, **result, "coalesced": coalesced}
+
+
+@app.websocket("/ws/predict")
+async def predict_stream(websocket: WebSocket):
+    """Push the prediction for the latest update only.
+
+    A background task keeps reading so the newest message always replaces
+    older unprocessed ones; the sender waits out the debounce window, then
+    answers just that newest message.
+    """
+    await websocket.accept()
+    latest = None
+    received = 0
+    closed = False
+    close_code = None
+    updated = asyncio.Event()
 
+    async def receive():
+        nonlocal latest, received, closed, close_code
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("text") is None:
+                    # Updates are JSON text frames; 1003 = unsupported data
+                    close_code = 1003
+                    break
+                latest = message["text"]
+                received += 1
+                updated.set()
+        except Exception:
+            logger.exception("WebSocket receive failed")
+            close_code = 1011
+        finally:
+            # Always wake the sender, or it waits on `updated` forever
+            closed = True
+            updated.set()
 
+    receiver = asyncio.create_task(receive())
+    try:
+        while True:
+            await updated.wait()
+            await asyncio.sleep(WS_DEBOUNCE_SECONDS)
+            updated.clear()
+            if closed:
+                break
+            message, coalesced = latest, received
+            received = 0
+            # Validation and the model run off the event loop, like the HTTP routes
+            result = await asyncio.to_thread(stream_result, message, coalesced)
+            await websocket.send_text(orjson.dumps(result).decode())
+        if close_code is not None:
+            await websocket.close(code=close_code)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
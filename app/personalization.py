@@ -0,0 +1,183 @@
+# app/personalization.py
+# Per-user residual corrections applied on top of the global model.
+#
+# Each user has a shrunk mean residual (preferred - global prediction). The
+# full set lives in a memory-mapped open-addressing hash table built offline
+# from the feedback log (app/retrain.py); recently used users are cached in a
+# bounded LRU warm set, and live feedback not yet in the table is kept as a
+# capped set of pending deltas until a rebuild that includes it is loaded.
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from app.schema import FEATURES
+
+SLOT_DTYPE = np.dtype([("key", "<u8"), ("residual_sum", "<f4"), ("count", "<u4")])
+USER_STORE_PATH = os.getenv("USER_STORE_PATH", "model/users.npy")
+
+# Pseudo-count pulling sparse users towards the global model
+PRIOR_COUNT = 3.0
+# Corrections are capped so no user can be pushed across the whole scale
+MAX_OFFSET = 3.0
+
+
+def user_key(user_id):
+    """Stable non-zero 64-bit key for a user id (0 marks an empty slot)."""
+    key = int.from_bytes(hashlib.blake2b(user_id.encode(), digest_size=8).digest(), "little")
+    return key or 1
+
+
+def offset_from(residual_sum, count):
+    return float(np.clip(residual_sum / (count + PRIOR_COUNT), -MAX_OFFSET, MAX_OFFSET))
+
+
+# ------------------------------------------------
+# COLD STORE (memory-mapped hash table)
+# ------------------------------------------------
+def build_table(keys, residual_sums, counts, watermark=0):
+    """Pack users into a power-of-two, at most half-full linear-probing table.
+
+    One extra trailing slot is a header whose key holds `watermark`: the byte
+    length of the feedback log the table was built from.
+    """
+    capacity = 1 << max(4, int(2 * max(len(keys), 1) - 1).bit_length())
+    table = np.zeros(capacity + 1, dtype=SLOT_DTYPE)
+    mask = capacity - 1
+    for key, residual_sum, count in zip(keys, residual_sums, counts):
+        slot = key & mask
+        while table["key"][slot] != 0:
+            slot = (slot + 1) & mask
+        table[slot] = (key, residual_sum, count)
+    table[-1]["key"] = watermark
+    return table
+
+
+def read_feedback_prefix(feedback_path):
+    """Return (frame, n_bytes) for the complete rows currently in the log."""
+    with open(feedback_path, "rb") as f:
+        data = f.read()
+    # A row still being appended is left for the next rebuild
+    data = data[:data.rfind(b"\n") + 1]
+    columns = FEATURES + ["coffee_strength", "user_id"]
+    frame = pd.read_csv(io.BytesIO(data), usecols=lambda name: name in columns, dtype={"user_id": str})
+    # Logs written before user ids existed have no such column
+    return frame.reindex(columns=columns), len(data)
+
+
+def build_user_store(feedback_path, engine, out_path=USER_STORE_PATH):
+    """Rebuild the cold store from the feedback log, with residuals against `engine`."""
+    feedback, watermark = read_feedback_prefix(feedback_path)
+    feedback = feedback.dropna()
+    residual = np.zeros(0)
+    if len(feedback):
+        residual = feedback["coffee_strength"].to_numpy() - engine.predict(feedback[FEATURES].to_numpy(dtype=np.float64))
+    grouped = pd.DataFrame({"user_id": feedback["user_id"].to_numpy(), "residual": residual}) \
+        .groupby("user_id")["residual"].agg(["sum", "count"])
+
+    keys = [user_key(user_id) for user_id in grouped.index]
+    table = build_table(keys, grouped["sum"].to_numpy(), grouped["count"].to_numpy(), watermark)
+    tmp_path = out_path + ".tmp.npy"
+    np.save(tmp_path, table)
+    os.replace(tmp_path, out_path)
+    return len(keys)
+
+
+class ColdStore:
+    def __init__(self, path):
+        self.table = np.load(path, mmap_mode="r")
+        self.mask = len(self.table) - 2
+        self.watermark = int(self.table[-1]["key"])
+
+    def get(self, key):
+        """Return (residual_sum, count) or None; O(1) expected probes into the mmap."""
+        slot = key & self.mask
+        while True:
+            entry = self.table[slot]
+            stored = int(entry["key"])
+            if stored == key:
+                return float(entry["residual_sum"]), int(entry["count"])
+            if stored == 0:
+                return None
+            slot = (slot + 1) & self.mask
+
+
+# ------------------------------------------------
+# WARM SET + LOOKUP
+# ------------------------------------------------
+class UserCalibrationStore:
+    """Thread-safe lookup of per-user corrections.
+
+    The warm set only caches cold-store entries, so evicting from it loses
+    nothing. Live feedback goes to `pending` as (log offset, residual) pairs;
+    a reload keeps the pairs past the new table's watermark, so each feedback
+    row is counted exactly once. At most `max_pending` pairs are kept, since
+    nothing drops them while the retrainer is not running: past that the
+    users least recently given feedback lose theirs. Their rows are still in
+    the feedback log, so the next rebuild brings them back.
+    """
+
+    def __init__(self, path=USER_STORE_PATH, max_warm=100_000, max_pending=1_000_000):
+        self.path = path
+        self.max_warm = max_warm
+        self.max_pending = max_pending
+        self.warm = OrderedDict()
+        self.pending = OrderedDict()
+        self.pending_rows = 0
+        self.cold = None
+        self.mtime = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        """(Re)open the cold store if it changed on disk; returns True when it did."""
+        mtime = os.path.getmtime(self.path) if os.path.exists(self.path) else None
+        if mtime == self.mtime:
+            return False
+        cold = ColdStore(self.path) if mtime is not None else None
+        watermark = cold.watermark if cold is not None else 0
+        with self._lock:
+            self.cold, self.mtime = cold, mtime
+            self.warm.clear()
+            self.pending = OrderedDict(
+                (key, kept) for key, deltas in self.pending.items()
+                if (kept := [(offset, r) for offset, r in deltas if offset > watermark])
+            )
+            self.pending_rows = sum(len(deltas) for deltas in self.pending.values())
+        return True
+
+    def _cold_entry(self, key):
+        entry = self.warm.get(key)
+        if entry is not None:
+            self.warm.move_to_end(key)
+            return entry
+        found = self.cold.get(key) if self.cold is not None else None
+        entry = found if found is not None else (0.0, 0)
+        self.warm[key] = entry
+        if len(self.warm) > self.max_warm:
+            self.warm.popitem(last=False)
+        return entry
+
+    def offset(self, user_id):
+        key = user_key(user_id)
+        with self._lock:
+            residual_sum, count = self._cold_entry(key)
+            deltas = self.pending.get(key, ())
+            residual_sum += sum(r for _, r in deltas)
+            count += len(deltas)
+        return offset_from(residual_sum, count) if count else 0.0
+
+    def update(self, user_id, residual, log_offset):
+        """Add one live feedback residual; `log_offset` is where its row ends in the feedback log."""
+        key = user_key(user_id)
+        with self._lock:
+            self.pending.setdefault(key, []).append((log_offset, residual))
+            self.pending.move_to_end(key)
+            self.pending_rows += 1
+            while self.pending_rows > self.max_pending:
+                _, dropped = self.pending.popitem(last=False)
+                self.pending_rows -= len(dropped)
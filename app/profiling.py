@@ -0,0 +1,190 @@
+# app/profiling.py
+# Admin-only diagnostics: an on-demand sampling profiler that emits collapsed
+# stacks (flamegraph.pl / speedscope format) and sampled per-request span
+# traces. Both are off by default; when off, the middleware costs two
+# attribute checks per request and span() a single ContextVar lookup.
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+# Samples whose innermost frame is one of these are threads parked waiting
+# for work (event loop select, idle threadpool workers), not request cost
+IDLE_LEAVES = {"wait", "select", "poll", "_worker"}
+
+_current_trace = ContextVar("trace", default=None)
+_NO_SPAN = nullcontext()
+
+
+# ------------------------------------------------
+# SAMPLING PROFILER
+# ------------------------------------------------
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples every thread's Python stack from a background thread.
+
+    One profile runs at a time and stops after `max_requests` finished
+    requests or `seconds`, whichever comes first.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.stacks = Counter()
+        self.samples = 0
+        self.remaining = None
+        self.include_idle = False
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def start(self, max_requests=None, seconds=30.0, interval=0.005, include_idle=False):
+        with self._lock:
+            if self.active:
+                raise RuntimeError("a profile is already running")
+            self.active = True
+        self.stacks = Counter()
+        self.samples = 0
+        self.remaining = max_requests
+        self.include_idle = include_idle
+        self.done.clear()
+        deadline = time.monotonic() + seconds
+        threading.Thread(target=self._run, args=(deadline, interval), name="profiler", daemon=True).start()
+
+    def _run(self, deadline, interval):
+        try:
+            while not self.done.is_set() and time.monotonic() < deadline:
+                self.sample()
+                self.done.wait(interval)
+        finally:
+            self.active = False
+            self.done.set()
+
+    def sample(self):
+        own = threading.get_ident()
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            if not self.include_idle and frame.f_code.co_name in IDLE_LEAVES:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def request_finished(self):
+        if self.remaining is not None:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self.done.set()
+
+    def collapsed(self):
+        """One `frame;frame;... count` line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+# ------------------------------------------------
+# SAMPLED TRACING
+# ------------------------------------------------
+class Trace:
+    def __init__(self, method, path):
+        self.id = secrets.token_hex(8)
+        self.method = method
+        self.path = path
+        self.status = None
+        self.spans = []
+        self.start = time.perf_counter()
+        self.duration = None
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append({
+                "name": name,
+                "start_ms": round((start - self.start) * 1e3, 3),
+                "duration_ms": round((time.perf_counter() - start) * 1e3, 3),
+            })
+
+    def to_dict(self):
+        return {
+            "trace_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "duration_ms": round(self.duration * 1e3, 3) if self.duration is not None else None,
+            "spans": self.spans,
+        }
+
+
+class Tracer:
+    """Traces a `rate` fraction of requests and keeps the most recent `keep`."""
+
+    def __init__(self, rate=0.0, keep=256):
+        self.rate = rate
+        self.traces = deque(maxlen=keep)
+
+    def sampled(self):
+        return self.rate > 0 and random.random() < self.rate
+
+
+def span(name):
+    """Time a block as a span of the current request's trace, if it is being traced.
+
+    Time before a request's first span is routing and body validation.
+    """
+    trace = _current_trace.get()
+    return _NO_SPAN if trace is None else trace.span(name)
+
+
+# ------------------------------------------------
+# MIDDLEWARE
+# ------------------------------------------------
+class ProfilingMiddleware:
+    def __init__(self, app, profiler, tracer):
+        self.app = app
+        self.profiler = profiler
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.profiler.active or self.tracer.rate):
+            return await self.app(scope, receive, send)
+        # Profiling requests are not part of what is being profiled
+        if scope["path"].startswith("/admin/"):
+            return await self.app(scope, receive, send)
+
+        try:
+            if self.tracer.sampled():
+                await self.traced(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            if self.profiler.active:
+                self.profiler.request_finished()
+
+    async def traced(self, scope, receive, send):
+        trace = Trace(scope["method"], scope["path"])
+
+        async def send_with_trace_id(message):
+            if message["type"] == "http.response.start":
+                trace.status = message["status"]
+                message = {**message, "headers": [*message.get("headers", []), (b"x-trace-id", trace.id.encode())]}
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace_id)
+        finally:
+            _current_trace.reset(token)
+            trace.duration = time.perf_counter() - trace.start
+            self.tracer.traces.append(trace)
@@ -0,0 +1,39 @@
+import msgpack
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+
+from app.profiling import span
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+
+# ------------------------------------------------
+# RESPONSE CLASSES
+# ------------------------------------------------
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson; NumPy arrays and scalars are serialized natively."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class MsgPackResponse(Response):
+    """MessagePack response for internal service-to-service callers."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def negotiate(request: Request, content) -> Response:
+    """Pick MessagePack when the caller asks for it, orjson otherwise.
+
+    Routes return these responses directly so FastAPI skips response_model
+    validation and jsonable_encoder; the declared models only document the shape.
+    """
+    with span("serialize"):
+        if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+            return MsgPackResponse(content)
+        return ORJSONResponse(content)
@@ -0,0 +1,199 @@
+# app/retrain.py
+# Background retraining on collected feedback. Runs as its own (niced)
+# process, never inside the API workers:
+#
+#   python -m app.retrain --watch --interval 300 --min-new-rows 50
+#
+# A candidate of the same kind as the served model (the path the API resolves
+# from MODEL_ENGINE / MODEL_PATH) is trained on the base dataset plus feedback,
+# and only replaces that file if it beats the current model on a fixed
+# held-out set. The API notices the new file and reloads it (see
+# app/main.py). The per-user corrections (app/personalization.py) are rebuilt
+# on every run.
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from sklearn.model_selection import train_test_split
+from sklearn.tree import DecisionTreeRegressor
+
+from app.artifact import export_model, load_artifact, load_engine, model_version, resolve_model_path
+from app.engine import SklearnEngine
+from app.conformal import calibrate
+from app.feedback import FEEDBACK_PATH
+from app.personalization import USER_STORE_PATH, build_user_store
+from app.schema import FEATURES
+
+BASE_DATA_PATH = "data/coffee_strength_dataset.csv"
+STATE_PATH = "model/retrain_state.json"
+
+# Every HOLDOUT_EVERY-th feedback row is held out, so the split never moves
+HOLDOUT_EVERY = 5
+
+
+# ------------------------------------------------
+# DATA
+# ------------------------------------------------
+def load_splits(base_path=BASE_DATA_PATH, feedback_path=FEEDBACK_PATH):
+    """Return (train, holdout) frames of FEATURES + coffee_strength.
+
+    The base rows use train_model.py's split; feedback rows are held out by
+    position, so the held-out set only ever grows.
+    """
+    columns = FEATURES + ["coffee_strength"]
+    base = pd.read_csv(base_path)[columns]
+    base_train, base_holdout = train_test_split(base, test_size=0.2, random_state=42)
+    if not os.path.exists(feedback_path):
+        return base_train, base_holdout
+
+    feedback = pd.read_csv(feedback_path, usecols=columns)[columns].dropna()
+    held = np.arange(len(feedback)) % HOLDOUT_EVERY == 0
+    train = pd.concat([base_train, feedback[~held]], ignore_index=True)
+    holdout = pd.concat([base_holdout, feedback[held]], ignore_index=True)
+    return train, holdout
+
+
+def count_rows(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb") as f:
+        return max(0, sum(1 for _ in f) - 1)
+
+
+def read_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {"feedback_rows": 0}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(state, f, indent=2)
+
+
+# ------------------------------------------------
+# RETRAIN
+# ------------------------------------------------
+def rmse(engine, frame):
+    error = engine.predict(frame[FEATURES].to_numpy(dtype=np.float64)) - frame["coffee_strength"].to_numpy()
+    return float(np.sqrt(np.mean(error ** 2)))
+
+
+def candidate_like(model_path):
+    """Unfitted estimator of the same kind as the model served from `model_path`.
+
+    Retraining keeps whatever train_model.py selected (e.g. a linear model
+    picked by --objective latency) instead of swapping in a costlier one.
+    """
+    if not os.path.exists(model_path):
+        # Nothing served yet: train_model.py's default choice
+        return RandomForestRegressor(n_estimators=200, random_state=42, n_jobs=1)
+    if not model_path.endswith(".npz"):
+        candidate = clone(joblib.load(model_path))
+        # Stay on one core, like the rest of this process
+        if "n_jobs" in candidate.get_params():
+            candidate.set_params(n_jobs=1)
+        return candidate
+    engine = load_artifact(model_path)
+    if engine.name == "linear":
+        return LinearRegression()
+    if engine.name == "trees" and engine.n_trees == 1:
+        return DecisionTreeRegressor(random_state=42)
+    if engine.name == "trees":
+        return RandomForestRegressor(n_estimators=engine.n_trees, random_state=42, n_jobs=1)
+    raise ValueError(f"Cannot retrain the {engine.name!r} model in {model_path}; "
+                     "retrain the model it was distilled from and distil it again")
+
+
+def retrain(model_path=None, base_path=BASE_DATA_PATH, feedback_path=FEEDBACK_PATH, min_improvement=0.0):
+    """Train a candidate and promote it if its held-out RMSE beats the current model's.
+
+    `model_path` defaults to the file the API serves; a .npz path gets a
+    compact artifact, anything else a joblib pickle, as app.artifact.load_engine expects.
+    """
+    model_path = model_path or resolve_model_path()
+    train, holdout = load_splits(base_path, feedback_path)
+    candidate = candidate_like(model_path)
+    candidate.fit(train[FEATURES], train["coffee_strength"])
+
+    candidate_path = model_path + ".candidate"
+    if model_path.endswith(".npz"):
+        export_model(candidate, candidate_path)
+        candidate_engine = load_artifact(candidate_path)
+    else:
+        joblib.dump(candidate, candidate_path)
+        candidate_engine = SklearnEngine(candidate)
+    candidate_rmse = rmse(candidate_engine, holdout)
+    current_rmse = rmse(load_engine(model_path), holdout) if os.path.exists(model_path) else float("inf")
+
+    promoted = candidate_rmse < current_rmse * (1 - min_improvement)
+    if promoted:
+        if hasattr(candidate_engine, "predict_interval"):
+            calibration = calibrate(candidate_engine, holdout[FEATURES].to_numpy(dtype=np.float64),
+                                    holdout["coffee_strength"])
+            export_model(candidate, candidate_path, calibration=calibration)
+        # Atomic swap, so the API never reads a half-written artifact
+        os.replace(candidate_path, model_path)
+    else:
+        os.remove(candidate_path)
+
+    return {
+        "promoted": promoted,
+        "train_rows": len(train),
+        "holdout_rows": len(holdout),
+        "candidate_rmse": candidate_rmse,
+        "current_rmse": current_rmse,
+        "model_version": model_version(model_path) if os.path.exists(model_path) else None,
+    }
+
+
+def run_once(min_new_rows, min_improvement=0.0, force=False):
+    """Retrain if at least `min_new_rows` feedback rows arrived since the last run."""
+    state = read_state()
+    rows = count_rows(FEEDBACK_PATH)
+    if not force and rows - state["feedback_rows"] < min_new_rows:
+        return None
+    model_path = resolve_model_path()
+    report = retrain(model_path, min_improvement=min_improvement)
+    # Residuals are relative to whichever model is serving now
+    report["users"] = build_user_store(FEEDBACK_PATH, load_engine(model_path), USER_STORE_PATH) if rows else 0
+    write_state({"feedback_rows": rows, "last_run": time.time(), "last_report": report})
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the MoodFuel model on collected feedback")
+    parser.add_argument("--watch", action="store_true", help="keep running and check every --interval seconds")
+    parser.add_argument("--interval", type=float, default=300)
+    parser.add_argument("--min-new-rows", type=int, default=50)
+    parser.add_argument("--min-improvement", type=float, default=0.0,
+                        help="required relative RMSE improvement before promoting, e.g. 0.01 = 1%%")
+    parser.add_argument("--force", action="store_true", help="retrain now even without new feedback")
+    args = parser.parse_args()
+
+    # Stay out of the way of any API workers sharing the machine
+    os.nice(10)
+    while True:
+        report = run_once(args.min_new_rows, args.min_improvement, force=args.force)
+        if report is not None:
+            verdict = "promoted" if report["promoted"] else "kept current model"
+            print(f"Retrained on {report['train_rows']} rows: candidate RMSE {report['candidate_rmse']:.4f} "
+                  f"vs current {report['current_rmse']:.4f} -> {verdict}; "
+                  f"{report['users']} user corrections rebuilt", flush=True)
+        if not args.watch:
+            break
+        args.force = False
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,165 @@
-from pydantic import BaseModel
+from typing import Annotated, Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+# Feature order the model was trained on (see train_model.py)
+FEATURES = ["sleep_hours", "stress_level", "time_of_day", "workload_level"]
+
+# Input domain, taken from data/DataGenerator.py. Sleep is left wider than the
+# 4-9h the generator samples so the dashboard slider (0-12h) keeps working;
+# the trees simply saturate outside the training range.
+DOMAIN = {
+    "sleep_hours": (0.0, 12.0),
+    "stress_level": (1, 10),
+    "time_of_day": (6, 22),
+    "workload_level": (1, 10),
+}
+
+SleepHours = Annotated[float, Field(ge=DOMAIN["sleep_hours"][0], le=DOMAIN["sleep_hours"][1])]
+StressLevel = Annotated[int, Field(ge=DOMAIN["stress_level"][0], le=DOMAIN["stress_level"][1])]
+TimeOfDay = Annotated[int, Field(ge=DOMAIN["time_of_day"][0], le=DOMAIN["time_of_day"][1])]
+WorkloadLevel = Annotated[int, Field(ge=DOMAIN["workload_level"][0], le=DOMAIN["workload_level"][1])]
+
+# Range of coffee_strength in the training data
+STRENGTH_RANGE = (1.0, 10.0)
+
+
+def round_strength(values):
+    """Round predicted strengths to 2 decimals.
+
+    Every endpoint and the bulk scorer round through here, so single, batch,
+    plan and offline scores agree exactly (Python's round() and np.round
+    disagree on some ties).
+    """
+    return np.round(values, 2)
+
+MAX_BATCH_SIZE = 10_000
+
+
+def domain_mask(X):
+    """Vectorized MoodInput check: True for rows of an (n, 4) matrix the API would accept."""
+    X = np.asarray(X, dtype=np.float64)
+    lower = np.array([DOMAIN[name][0] for name in FEATURES])
+    upper = np.array([DOMAIN[name][1] for name in FEATURES])
+    integral = np.array([isinstance(DOMAIN[name][0], int) for name in FEATURES])
+    ok = (X >= lower) & (X <= upper)
+    ok[:, integral] &= X[:, integral] == np.round(X[:, integral])
+    return ok.all(axis=1)
+
+
 # Modle Schema
 class MoodInput(BaseModel):
-    sleep_hours: float
-    stress_level: int
-    time_of_day: int 
-    workload_level: int
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    sleep_hours: SleepHours
+    stress_level: StressLevel
+    time_of_day: TimeOfDay
+    workload_level: WorkloadLevel
+    # Optional: enables the per-user correction learned from /feedback
+    user_id: Optional[str] = Field(default=None, min_length=1, max_length=128)
+
+    def to_array(self):
+        """Return a (1, 4) float64 matrix in FEATURES order."""
+        return np.array([[self.sleep_hours, self.stress_level, self.time_of_day, self.workload_level]])
+
+
+# One update on the /ws/predict stream; seq is echoed back so clients can
+# tell which slider position a pushed prediction belongs to
+class StreamUpdate(MoodInput):
+    seq: Optional[int] = None
+
+
+# What the user actually wanted for a given input; see POST /feedback
+class FeedbackInput(MoodInput):
+    preferred_strength: Annotated[float, Field(ge=STRENGTH_RANGE[0], le=STRENGTH_RANGE[1])]
+    predicted_strength: Optional[float] = None
+
+
+# Columnar batch schema: one array per feature instead of a list of objects,
+# so validation runs once per column and the result maps straight onto a matrix.
+class MoodBatch(BaseModel):
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    sleep_hours: List[SleepHours] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    stress_level: List[StressLevel] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    time_of_day: List[TimeOfDay] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    workload_level: List[WorkloadLevel] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+    @model_validator(mode="after")
+    def check_lengths(self):
+        lengths = {len(getattr(self, name)) for name in FEATURES}
+        if len(lengths) != 1:
+            raise ValueError("all feature columns must have the same length")
+        return self
+
+    def __len__(self):
+        return len(self.sleep_hours)
+
+    def to_array(self):
+        """Return an (n, 4) float64 matrix in FEATURES order."""
+        out = np.empty((len(self), len(FEATURES)), dtype=np.float64)
+        for i, name in enumerate(FEATURES):
+            out[:, i] = getattr(self, name)
+        return out
+
+
+# Full-day plan: the same inputs at every hour from start_hour to end_hour
+class PlanInput(BaseModel):
+    model_config = ConfigDict(strict=True, extra="forbid")
+
+    sleep_hours: SleepHours
+    stress_level: StressLevel
+    workload_level: WorkloadLevel
+    start_hour: TimeOfDay = DOMAIN["time_of_day"][0]
+    end_hour: TimeOfDay = DOMAIN["time_of_day"][1]
+    # Hours recommending at most this strength (a light brew) are past the cutoff
+    cutoff_strength: float = Field(default=4.0, ge=1, le=10)
+
+    @model_validator(mode="after")
+    def check_hours(self):
+        if self.start_hour > self.end_hour:
+            raise ValueError("start_hour must not be after end_hour")
+        return self
+
+    def key(self):
+        return (self.sleep_hours, self.stress_level, self.workload_level,
+                self.start_hour, self.end_hour, self.cutoff_strength)
+
+
+# Response models. Routes build plain dicts and serialize them directly
+# (see app/responses.py); these only declare the shape for the OpenAPI docs.
+# baseline + sum(contributions) is the unrounded prediction (before clipping
+# for the surrogate engine)
+class Explanation(BaseModel):
+    baseline: float
+    contributions: Dict[str, float]
+
+
+# lower/upper/std are only present with ?interval=true, explanation with ?explain=true,
+# personal_offset when a user_id was sent (the explanation covers the global model only)
+class PredictionResponse(BaseModel):
+    recommended_strength: float
+    lower: Optional[float] = None
+    upper: Optional[float] = None
+    std: Optional[float] = None
+    explanation: Optional[Explanation] = None
+    personal_offset: Optional[float] = None
+
+
+class BatchPredictionResponse(BaseModel):
+    recommended_strength: List[float]
+    lower: Optional[List[float]] = None
+    upper: Optional[List[float]] = None
+    std: Optional[List[float]] = None
+
+
+class PlanResponse(BaseModel):
+    hours: List[int]
+    recommended_strength: List[float]
+    best_hour: int
+    cutoff_hour: Optional[int]
 
 '''
 This ensures clean, validated input data -- no missing or invalid fields when someone hits your API
-'''
\ No newline at end of file
+'''
@@ -0,0 +1,90 @@
+# app/selection.py
+# Accuracy vs serving-cost model selection used by train_model.py.
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.artifact import export_model, load_artifact
+
+OBJECTIVES = {
+    "rmse": "cv_rmse",
+    "latency": "single_latency_us",
+    "batch_latency": "batch_latency_us",
+    "size": "artifact_bytes",
+    "load": "load_ms",
+}
+
+
+def _best_time(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_candidate(model, X, batch_size=1000, repeat=50):
+    """Export a fitted model and measure what serving it would cost.
+
+    Latencies are taken on the compact artifact engine, i.e. what app/main.py serves.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    batch = X[np.arange(batch_size) % len(X)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = export_model(model, os.path.join(tmp, "model.npz"))
+        artifact_bytes = os.path.getsize(path)
+        load_s = _best_time(lambda: load_artifact(path), repeat=5)
+        engine = load_artifact(path)
+
+    single = X[:1]
+    engine.predict(single)
+    return {
+        "artifact_bytes": artifact_bytes,
+        "load_ms": load_s * 1e3,
+        "single_latency_us": _best_time(lambda: engine.predict(single), repeat) * 1e6,
+        "batch_latency_us": _best_time(lambda: engine.predict(batch), max(1, repeat // 10)) * 1e6,
+        "batch_size": batch_size,
+    }
+
+
+def pareto_front(results, cost="single_latency_us"):
+    """Names of candidates not beaten on both CV RMSE and `cost`."""
+    front = []
+    for name, r in results.items():
+        dominated = any(
+            o["cv_rmse"] <= r["cv_rmse"] and o[cost] <= r[cost]
+            and (o["cv_rmse"] < r["cv_rmse"] or o[cost] < r[cost])
+            for other, o in results.items() if other != name
+        )
+        if not dominated:
+            front.append(name)
+    return sorted(front, key=lambda name: results[name]["cv_rmse"])
+
+
+def select_model(results, objective="rmse", rmse_tolerance=0.05):
+    """Cheapest candidate by `objective` among those within `rmse_tolerance` of the best CV RMSE."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; choose from {sorted(OBJECTIVES)}")
+    best_rmse = min(r["cv_rmse"] for r in results.values())
+    eligible = {name: r for name, r in results.items() if r["cv_rmse"] <= best_rmse * (1 + rmse_tolerance)}
+    key = OBJECTIVES[objective]
+    return min(eligible, key=lambda name: (eligible[name][key], eligible[name]["cv_rmse"]))
+
+
+def write_report(path, results, selected, objective, rmse_tolerance):
+    report = {
+        "objective": objective,
+        "rmse_tolerance": rmse_tolerance,
+        "selected": selected,
+        "pareto_front": pareto_front(results),
+        "candidates": results,
+    }
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
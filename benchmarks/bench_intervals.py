@@ -0,0 +1,58 @@
+# benchmarks/bench_intervals.py
+# Cost of prediction intervals: plain engine.predict vs engine.predict_interval
+# vs the naive loop calling every sklearn estimator separately.
+#
+#   python benchmarks/bench_intervals.py --model model/model.npz --pickle model/model.pkl
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.artifact import load_artifact  # noqa: E402
+from app.schema import FEATURES  # noqa: E402
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="model/model.npz")
+    parser.add_argument("--pickle", default="model/model.pkl")
+    parser.add_argument("--data", default="data/coffee_strength_dataset.csv")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = load_artifact(args.model)
+    forest = joblib.load(args.pickle)
+    X = pd.read_csv(args.data)[FEATURES].to_numpy(dtype=np.float64)
+
+    def naive(rows):
+        per_tree = np.stack([est.predict(rows) for est in forest.estimators_])
+        return per_tree.mean(axis=0), np.quantile(per_tree, [0.05, 0.95], axis=0), per_tree.std(axis=0)
+
+    for label, rows in [("1 row", X[:1]), (f"{len(X)} rows", X)]:
+        plain = bench(lambda: engine.predict(rows), args.repeat)
+        print(label)
+        for name, fn in [
+            ("predict", lambda: engine.predict(rows)),
+            ("predict_interval", lambda: engine.predict_interval(rows)),
+            ("per-estimator loop", lambda: naive(rows)),
+        ]:
+            seconds = bench(fn, args.repeat)
+            print(f"  {name:>18}: {seconds * 1e3:9.3f} ms  {seconds / plain:6.2f}x predict")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_serialization.py
+# Response serialization: FastAPI's default path (response_model validation +
+# jsonable_encoder + stdlib json) vs orjson and MessagePack.
+#
+#   python benchmarks/bench_serialization.py --rows 1000 --repeat 200
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import msgpack
+import numpy as np
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.schema import BatchPredictionResponse, PredictionResponse  # noqa: E402
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def default_encoder(response_model, content):
+    validated = response_model.model_validate(content)
+    return json.dumps(jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    single = {"recommended_strength": 6.42}
+    batch = {"recommended_strength": np.round([rng.uniform(1, 10) for _ in range(args.rows)], 2).tolist()}
+
+    for label, response_model, content in [
+        ("single", PredictionResponse, single),
+        (f"batch[{args.rows}]", BatchPredictionResponse, batch),
+    ]:
+        encoders = {
+            "default": lambda: default_encoder(response_model, content),
+            "orjson": lambda: orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY),
+            "msgpack": lambda: msgpack.packb(content, use_bin_type=True),
+        }
+        print(label)
+        baseline = None
+        for name, fn in encoders.items():
+            seconds = bench(fn, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:>8}: {seconds * 1e6:10.2f} us  {len(fn()):>8,} bytes  {baseline / seconds:6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
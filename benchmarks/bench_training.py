@@ -0,0 +1,249 @@
+# benchmarks/bench_training.py
+# How the training pipeline scales with dataset size: wall time, CPU time and
+# peak RSS of each stage (generate, load, cv, fit, save, load_pickle,
+# load_artifact), plus the serving latency of the artifact it produces.
+#
+#   python benchmarks/bench_training.py --sizes 1000 10000 100000 1000000 10000000
+#
+# Every stage runs in its own subprocess so peak RSS is per stage, and stages
+# hand data over through files in --workdir like the real pipeline does. Only
+# a stage's own work is timed: "fit" is the fit alone, "save" the pickle dump
+# plus artifact export, and reading the previous stage's output is not
+# counted. A stage that fails or passes --timeout is recorded and skipped for
+# bigger sizes (along with the stages that depend on it). Results go to --out as JSON and,
+# when matplotlib is installed, scaling curves to --plot.
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "data"))
+from DataGenerator import generate_coffee_dataset  # noqa: E402
+from app.artifact import export_model, load_artifact  # noqa: E402
+from app.schema import FEATURES  # noqa: E402
+
+STAGES = ["generate", "load", "cv", "fit", "save", "load_pickle", "load_artifact"]
+# A stage only runs if the one it reads from succeeded
+DEPENDS_ON = {"load": "generate", "cv": "generate", "fit": "generate", "save": "fit",
+              "load_pickle": "save", "load_artifact": "save"}
+
+
+def candidates(trees):
+    """Same candidates as train_model.py."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    from sklearn.tree import DecisionTreeRegressor
+
+    return {
+        "Linear Regression": LinearRegression(),
+        "Decision Tree": DecisionTreeRegressor(random_state=42),
+        "Random Forest": RandomForestRegressor(n_estimators=trees, random_state=42, n_jobs=-1),
+    }
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# ------------------------------------------------
+# STAGES (run inside the child process)
+# ------------------------------------------------
+def split(workdir):
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(os.path.join(workdir, "data.csv"))
+    return train_test_split(df[FEATURES], df["coffee_strength"], test_size=0.2, random_state=42)
+
+
+def prepare_stage(stage, rows, workdir, trees):
+    """Return (work, finish) for one stage.
+
+    Only `work()` is timed. Setup happens here, and `finish(result)` writes
+    the files later stages read and returns extra metrics to record.
+    """
+    csv_path = os.path.join(workdir, "data.csv")
+    pkl_path = os.path.join(workdir, "model.pkl")
+    npz_path = os.path.join(workdir, "model.npz")
+
+    if stage == "generate":
+        def work():
+            generate_coffee_dataset(rows).to_csv(csv_path, index=False)
+        return work, lambda _: {"csv_bytes": os.path.getsize(csv_path)}
+    if stage == "load":
+        return lambda: pd.read_csv(csv_path), lambda df: {"rows_loaded": len(df)}
+    if stage == "cv":
+        from sklearn.model_selection import cross_val_score
+
+        X_train, _, y_train, _ = split(workdir)
+
+        def work():
+            return {name: float(-cross_val_score(model, X_train, y_train, cv=5,
+                                                 scoring="neg_root_mean_squared_error").mean())
+                    for name, model in candidates(trees).items()}
+        return work, lambda cv_rmse: {"cv_rmse": cv_rmse}
+    if stage == "fit":
+        X_train, _, y_train, _ = split(workdir)
+        model = candidates(trees)["Random Forest"]
+
+        def finish(fitted):
+            # Hand the model to "save" through a pickle, outside the timing
+            joblib.dump(fitted, pkl_path)
+            return {}
+        return lambda: model.fit(X_train, y_train), finish
+    if stage == "save":
+        model = joblib.load(pkl_path)
+
+        def work():
+            joblib.dump(model, pkl_path)
+            export_model(model, npz_path)
+        return work, lambda _: {"pickle_bytes": os.path.getsize(pkl_path), "artifact_bytes": os.path.getsize(npz_path)}
+    if stage == "load_pickle":
+        # Unpickling imports scikit-learn first; time that apart from the load itself
+        start = time.perf_counter()
+        import sklearn.ensemble  # noqa: F401
+        sklearn_import_s = time.perf_counter() - start
+        return lambda: joblib.load(pkl_path), lambda _: {"sklearn_import_s": sklearn_import_s}
+    if stage == "load_artifact":
+        def finish(engine):
+            # Serving latency of the loaded artifact, measured after the timed load
+            X = np.tile(np.array([[6.5, 7, 9, 8]], dtype=np.float64), (1000, 1))
+            single = [bench(lambda: engine.predict(X[:1]), 1) for _ in range(1000)]
+            return {
+                "single_p50_us": float(np.percentile(single, 50) * 1e6),
+                "single_p99_us": float(np.percentile(single, 99) * 1e6),
+                "batch_1000_ms": bench(lambda: engine.predict(X), 20) * 1e3,
+            }
+        return lambda: load_artifact(npz_path), finish
+    raise ValueError(f"unknown stage {stage!r}")
+
+
+def child(stage, rows, workdir, trees):
+    work, finish = prepare_stage(stage, rows, workdir, trees)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    cpu_before = sum(os.times()[:4])
+    start = time.perf_counter()
+    result = work()
+    wall = time.perf_counter() - start
+    cpu = sum(os.times()[:4]) - cpu_before
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    extra = finish(result)
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({
+        "wall_s": wall,
+        "cpu_s": cpu,
+        "cpu_util": cpu / wall if wall else None,
+        "peak_rss_mb": peak_rss / 1024,
+        "baseline_rss_mb": rss_before / 1024,
+        **extra,
+    }))
+
+
+# ------------------------------------------------
+# DRIVER
+# ------------------------------------------------
+def run_in_subprocess(stage, rows, workdir, trees, timeout):
+    command = [sys.executable, os.path.abspath(__file__), "--stage", stage, "--rows", str(rows),
+               "--workdir", workdir, "--trees", str(trees)]
+    try:
+        done = subprocess.run(command, capture_output=True, text=True, timeout=timeout, cwd=ROOT)
+    except subprocess.TimeoutExpired:
+        return {"status": "timeout"}
+    if done.returncode != 0:
+        return {"status": "failed", "error": done.stderr.strip().splitlines()[-1:]}
+    return {"status": "ok", **json.loads(done.stdout.strip().splitlines()[-1])}
+
+
+def plot(results, path):
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        print("matplotlib is not installed; skipping the plot")
+        return
+
+    fig, axes = plt.subplots(1, 3, figsize=(16, 5))
+    for stage in STAGES:
+        points = [(r["rows"], r["stages"][stage]) for r in results if r["stages"].get(stage, {}).get("status") == "ok"]
+        if not points:
+            continue
+        rows = [n for n, _ in points]
+        axes[0].plot(rows, [m["wall_s"] for _, m in points], marker="o", label=stage)
+        axes[1].plot(rows, [m["peak_rss_mb"] for _, m in points], marker="o", label=stage)
+        axes[2].plot(rows, [m["cpu_util"] or 0 for _, m in points], marker="o", label=stage)
+    for ax, title in zip(axes, ["wall time (s)", "peak RSS (MB)", "CPU utilization (cores)"]):
+        ax.set_xscale("log")
+        ax.set_xlabel("rows")
+        ax.set_title(title)
+        ax.grid(True, which="both", alpha=0.3)
+    axes[0].set_yscale("log")
+    axes[0].legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    print(f"Scaling curves saved to {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--trees", type=int, default=200, help="forest size, 200 as in train_model.py")
+    parser.add_argument("--timeout", type=float, default=1800, help="per stage, in seconds")
+    parser.add_argument("--workdir", default=None, help="scratch directory (default: a temporary one)")
+    parser.add_argument("--out", default="training_scaling.json")
+    parser.add_argument("--plot", default="training_scaling.png")
+    # Internal: run a single stage in this process and print its metrics
+    parser.add_argument("--stage", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.stage:
+        return child(args.stage, args.rows, args.workdir, args.trees)
+
+    results = []
+    given_up = set()
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in sorted(args.sizes):
+            print(f"{rows:,} rows")
+            stages = {}
+            for stage in [s for s in STAGES if s in args.stages]:
+                dependency = DEPENDS_ON.get(stage)
+                if stage in given_up or (dependency in args.stages and stages[dependency]["status"] != "ok"):
+                    stages[stage] = {"status": "skipped"}
+                else:
+                    stages[stage] = run_in_subprocess(stage, rows, workdir, args.trees, args.timeout)
+                m = stages[stage]
+                if m["status"] == "ok":
+                    print(f"  {stage:>13}: {m['wall_s']:9.3f} s  cpu {m['cpu_s']:9.3f} s "
+                          f"({m['cpu_util']:4.2f} cores)  peak RSS {m['peak_rss_mb']:8.1f} MB")
+                else:
+                    print(f"  {stage:>13}: {m['status']}")
+                    if m["status"] != "skipped":
+                        given_up.add(stage)
+            results.append({"rows": rows, "stages": stages})
+
+            # Rewrite after every size so a long run can be inspected (or killed) midway
+            with open(args.out, "w") as f:
+                json.dump({"trees": args.trees, "cpu_count": os.cpu_count(), "results": results}, f, indent=2)
+
+    print(f"Results saved to {args.out}")
+    plot(results, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_validation.py
+# Validation throughput: list-of-objects payload vs columnar MoodBatch payload.
+#
+#   python benchmarks/bench_validation.py --rows 1000 --repeat 20
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from app.schema import FEATURES, MoodBatch, MoodInput  # noqa: E402
+
+
+def make_rows(n, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "sleep_hours": round(rng.uniform(4, 9), 1),
+            "stress_level": rng.randint(1, 10),
+            "time_of_day": rng.randint(6, 22),
+            "workload_level": rng.randint(1, 10),
+        }
+        for _ in range(n)
+    ]
+
+
+def bench(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    object_body = json.dumps(rows).encode()
+    columnar_body = json.dumps({name: [r[name] for r in rows] for name in FEATURES}).encode()
+
+    objects = TypeAdapter(list[MoodInput])
+
+    def parse_objects():
+        items = objects.validate_json(object_body)
+        return np.array([[getattr(item, name) for name in FEATURES] for item in items], dtype=np.float64)
+
+    def parse_columnar():
+        return MoodBatch.model_validate_json(columnar_body).to_array()
+
+    assert np.array_equal(parse_objects(), parse_columnar())
+
+    print(f"rows={args.rows} repeat={args.repeat}")
+    results = {}
+    for label, fn, body in [
+        ("objects", parse_objects, object_body),
+        ("columnar", parse_columnar, columnar_body),
+    ]:
+        seconds = bench(fn, args.repeat)
+        results[label] = seconds
+        print(f"{label:>9}: {seconds * 1e3:8.3f} ms  {args.rows / seconds:12,.0f} rows/s  ({len(body):,} bytes)")
+    print(f"  speedup: {results['objects'] / results['columnar']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
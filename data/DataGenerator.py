@@ -57,10 +57,11 @@ def generate_coffee_dataset(n_samples=1000):
 
     return pd.DataFrame(data, columns=columns)
 
-# Generate dataset
-df = generate_coffee_dataset(1000)
+if __name__ == "__main__":
+    # Generate dataset
+    df = generate_coffee_dataset(1000)
 
-# Save to CSV
-df.to_csv("coffee_strength_dataset.csv", index=False)
+    # Save to CSV
+    df.to_csv("coffee_strength_dataset.csv", index=False)
 
-print(df.head())
+    print(df.head())
@@ -1,8 +1,17 @@
+import pytest
 from fastapi.testclient import TestClient
-from app.main import app
+from starlette.websockets import WebSocketDisconnect
+from app.limits import TokenBucketLimiter
+from app.main import admission, app
 
 client = TestClient(app)
 
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    """Every TestClient request comes from one IP; keep tests out of each other's bucket."""
+    monkeypatch.setattr(admission, "limiter", None)
+
 def test_health():
     response = client.get("/health")
     assert response.status_code == 200
@@ -18,4 +27,350 @@ def test_predict():
     }
     response = client.post("/predict", json=payload)
     assert response.status_code == 200
-    assert "recommended_strength" in response.json()
\ No newline at end of file
+    assert "recommended_strength" in response.json()
+
+def test_predict_rejects_out_of_range():
+    payload = {
+        "sleep_hours": 6.5,
+        "stress_level": 50,
+        "time_of_day": 3,
+        "workload_level": 8
+    }
+    response = client.post("/predict", json=payload)
+    assert response.status_code == 422
+
+
+def test_predict_batch():
+    payload = {
+        "sleep_hours": [6.5, 8.0],
+        "stress_level": [7, 2],
+        "time_of_day": [9, 20],
+        "workload_level": [8, 3]
+    }
+    response = client.post("/predict/batch", json=payload)
+    assert response.status_code == 200
+    assert len(response.json()["recommended_strength"]) == 2
+
+    payload["workload_level"] = [8]
+    response = client.post("/predict/batch", json=payload)
+    assert response.status_code == 422
+
+
+def test_predict_msgpack():
+    import msgpack
+
+    payload = {
+        "sleep_hours": 6.5,
+        "stress_level": 7,
+        "time_of_day": 9,
+        "workload_level": 8
+    }
+    response = client.post("/predict", json=payload, headers={"Accept": "application/msgpack"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.post("/predict", json=payload).json()
+
+
+def test_plan():
+    payload = {"sleep_hours": 6.5, "stress_level": 7, "workload_level": 8}
+    response = client.post("/plan", json=payload)
+    assert response.status_code == 200
+    plan = response.json()
+    assert plan["hours"] == list(range(6, 23))
+    assert len(plan["recommended_strength"]) == 17
+    assert plan["best_hour"] in plan["hours"]
+
+    single = client.post("/predict", json={**payload, "time_of_day": 9}).json()
+    assert plan["recommended_strength"][3] == single["recommended_strength"]
+
+    response = client.post("/plan", json={**payload, "start_hour": 20, "end_hour": 8})
+    assert response.status_code == 422
+
+
+def test_plan_cache_follows_model_version(monkeypatch):
+    import numpy as np
+    import app.main
+
+    class ConstantEngine:
+        name = "constant"
+
+        def __init__(self, value):
+            self.value = value
+
+        def predict(self, X):
+            return np.full(len(X), self.value)
+
+    payload = {"sleep_hours": 6.5, "stress_level": 2, "workload_level": 3}
+    monkeypatch.setattr(app.main, "engine", ConstantEngine(3.0))
+    monkeypatch.setattr(app.main, "MODEL_VERSION", "old")
+    assert client.post("/plan", json=payload).json()["recommended_strength"][0] == 3.0
+    # A reload swaps the engine and version without clearing the cache
+    monkeypatch.setattr(app.main, "engine", ConstantEngine(7.0))
+    monkeypatch.setattr(app.main, "MODEL_VERSION", "new")
+    assert client.post("/plan", json=payload).json()["recommended_strength"][0] == 7.0
+
+
+def test_predict_interval(tmp_path, monkeypatch):
+    import pandas as pd
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.linear_model import LinearRegression
+    import app.main
+    from app.artifact import export_model, load_artifact
+    from app.schema import FEATURES
+
+    df = pd.read_csv("data/coffee_strength_dataset.csv")
+    forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(df[FEATURES], df["coffee_strength"])
+    monkeypatch.setattr(app.main, "engine", load_artifact(export_model(forest, str(tmp_path / "forest.npz"))))
+    payload = {
+        "sleep_hours": 6.5,
+        "stress_level": 7,
+        "time_of_day": 9,
+        "workload_level": 8
+    }
+    response = client.post("/predict?interval=true", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    assert result["lower"] <= result["recommended_strength"] <= result["upper"]
+    assert result["std"] >= 0
+    assert result["recommended_strength"] == client.post("/predict", json=payload).json()["recommended_strength"]
+    batch = client.post("/predict/batch?interval=true", json={k: [v, v] for k, v in payload.items()}).json()
+    assert batch["lower"] == [result["lower"]] * 2 and batch["upper"] == [result["upper"]] * 2
+
+    linear = LinearRegression().fit(df[FEATURES], df["coffee_strength"])
+    monkeypatch.setattr(app.main, "engine", load_artifact(export_model(linear, str(tmp_path / "linear.npz"))))
+    assert client.post("/predict?interval=true", json=payload).status_code == 400
+    assert client.post("/predict/batch?interval=true", json={k: [v] for k, v in payload.items()}).status_code == 400
+
+
+def test_predict_explain():
+    payload = {
+        "sleep_hours": 4.5,
+        "stress_level": 9,
+        "time_of_day": 8,
+        "workload_level": 9
+    }
+    response = client.post("/predict?explain=true", json=payload)
+    assert response.status_code == 200
+    result = response.json()
+    explanation = result["explanation"]
+    assert set(explanation["contributions"]) == set(payload)
+    total = explanation["baseline"] + sum(explanation["contributions"].values())
+    assert abs(total - result["recommended_strength"]) < 0.05
+
+
+def test_explain_cache_follows_model_version(monkeypatch):
+    import app.main
+    from app.engine import LinearEngine
+
+    payload = {"sleep_hours": 7.0, "stress_level": 2, "time_of_day": 10, "workload_level": 2}
+    monkeypatch.setattr(app.main, "engine", LinearEngine([0, 0, 0, 0], 4.0))
+    monkeypatch.setattr(app.main, "MODEL_VERSION", "old")
+    assert client.post("/predict?explain=true", json=payload).json()["explanation"]["baseline"] == 4.0
+    monkeypatch.setattr(app.main, "engine", LinearEngine([0, 0, 0, 0], 6.0))
+    monkeypatch.setattr(app.main, "MODEL_VERSION", "new")
+    assert client.post("/predict?explain=true", json=payload).json()["explanation"]["baseline"] == 6.0
+
+
+def test_predict_stream_coalesces_updates():
+    payload = {
+        "sleep_hours": 6.5,
+        "stress_level": 7,
+        "time_of_day": 9,
+        "workload_level": 8
+    }
+    with client.websocket_connect("/ws/predict") as websocket:
+        for seq, hour in enumerate([9, 10, 11]):
+            websocket.send_json({**payload, "time_of_day": hour, "seq": seq})
+        result = websocket.receive_json()
+        assert result["seq"] == 2
+        assert result["coalesced"] == 3
+        expected = client.post("/predict", json={**payload, "time_of_day": 11}).json()
+        assert result["recommended_strength"] == expected["recommended_strength"]
+
+        websocket.send_json({**payload, "time_of_day": 3})
+        assert "error" in websocket.receive_json()
+
+
+def test_predict_stream_rejects_binary_frames():
+    with client.websocket_connect("/ws/predict") as websocket:
+        websocket.send_bytes(b"{}")
+        with pytest.raises(WebSocketDisconnect) as closed:
+            websocket.receive_json()
+    assert closed.value.code == 1003
+
+
+def test_predict_get_is_cacheable():
+    url = "/predict?sleep_hours=6.5&stress_level=7&time_of_day=9&workload_level=8"
+    response = client.get(url)
+    assert response.status_code == 200
+    assert "max-age" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert response.json() == client.post("/predict", json={
+        "sleep_hours": 6.5,
+        "stress_level": 7,
+        "time_of_day": 9,
+        "workload_level": 8
+    }).json()
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = client.get("/predict?workload_level=8&time_of_day=9&stress_level=7&sleep_hours=6.50",
+                          follow_redirects=False)
+    assert response.status_code == 301
+    assert response.headers["location"] == url
+
+
+def test_rate_limit_per_api_key(monkeypatch):
+    monkeypatch.setattr(admission, "limiter", TokenBucketLimiter(rate=1, burst=5))
+    monkeypatch.setattr(admission, "api_keys", frozenset({"test-rate-limit"}))
+    headers = {"X-API-Key": "test-rate-limit"}
+    codes = [client.get("/health", headers=headers).status_code for _ in range(10)]
+    assert 429 in codes
+    assert client.get("/health").status_code == 200
+    assert client.get("/metrics").json()["limiter"]["rate_limited"] >= 1
+
+    # Unknown keys share the caller's IP bucket instead of getting a fresh one each
+    codes = [client.get("/health", headers={"X-API-Key": f"made-up-{i}"}).status_code for i in range(10)]
+    assert 429 in codes
+    assert set(admission.limiter.buckets) == {"key:test-rate-limit", "ip:testclient"}
+    assert admission.metrics()["rate_limited"] >= 2
+
+
+def test_rate_limit_covers_websockets(monkeypatch):
+    monkeypatch.setattr(admission, "limiter", TokenBucketLimiter(rate=0.01, burst=1))
+    rate_limited = admission.metrics()["rate_limited"]
+    with client.websocket_connect("/ws/predict"):
+        pass
+    with pytest.raises(WebSocketDisconnect) as refused:
+        with client.websocket_connect("/ws/predict"):
+            pass
+    assert refused.value.code == 1008
+    assert admission.metrics()["rate_limited"] == rate_limited + 1
+
+
+def test_feedback(tmp_path, monkeypatch):
+    import app.main
+    from app.feedback import FeedbackStore
+
+    monkeypatch.setattr(app.main, "feedback_store", FeedbackStore(str(tmp_path / "feedback.csv")))
+    payload = {
+        "sleep_hours": 6.5,
+        "stress_level": 7,
+        "time_of_day": 9,
+        "workload_level": 8,
+        "preferred_strength": 8.5,
+        "predicted_strength": 7.2
+    }
+    assert client.post("/feedback", json=payload).json() == {"status": "recorded"}
+    assert client.post("/feedback", json={**payload, "preferred_strength": 11}).status_code == 422
+
+    rows = (tmp_path / "feedback.csv").read_text().splitlines()
+    assert len(rows) == 2
+    assert rows[1].startswith("6.5,7,9,8,8.5,7.2,")
+
+
+def test_personalized_prediction(tmp_path, monkeypatch):
+    import app.main
+    from app.feedback import FeedbackStore
+    from app.personalization import UserCalibrationStore
+
+    monkeypatch.setattr(app.main, "feedback_store", FeedbackStore(str(tmp_path / "feedback.csv")))
+    monkeypatch.setattr(app.main, "user_store", UserCalibrationStore(str(tmp_path / "users.npy")))
+    payload = {"sleep_hours": 6.5, "stress_level": 7, "time_of_day": 9, "workload_level": 8}
+    base = client.post("/predict", json=payload).json()["recommended_strength"]
+
+    fresh = client.post("/predict", json={**payload, "user_id": "alice"}).json()
+    assert fresh == {"recommended_strength": base, "personal_offset": 0.0}
+
+    for _ in range(5):
+        client.post("/feedback", json={**payload, "user_id": "alice", "preferred_strength": min(base + 2, 10.0)})
+    personal = client.post("/predict", json={**payload, "user_id": "alice"}).json()
+    assert personal["personal_offset"] > 0
+    assert personal["recommended_strength"] > base
+    assert client.post("/predict", json=payload).json()["recommended_strength"] == base
+
+
+def test_admin_diagnostics(monkeypatch):
+    import threading
+    import time
+    import app.main
+
+    payload = {"sleep_hours": 6.5, "stress_level": 7, "time_of_day": 9, "workload_level": 8}
+    headers = {}
+    assert client.get("/admin/traces", headers=headers).status_code == 404
+    monkeypatch.setattr(app.main, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/traces", headers={**headers, "X-Admin-Token": "wrong"}).status_code == 403
+    headers["X-Admin-Token"] = "secret"
+
+    monkeypatch.setattr(app.main.tracer, "rate", 1.0)
+    response = client.post("/predict?explain=true", json=payload, headers=headers)
+    trace = client.get("/admin/traces?limit=1", headers=headers).json()["traces"][0]
+    assert trace["trace_id"] == response.headers["x-trace-id"]
+    assert trace["path"] == "/predict" and trace["status"] == 200
+    assert {"model", "explain", "serialize"} <= {s["name"] for s in trace["spans"]}
+    monkeypatch.setattr(app.main.tracer, "rate", 0.0)
+    assert "x-trace-id" not in client.post("/predict", json=payload, headers=headers).headers
+
+    result = {}
+    worker = threading.Thread(target=lambda: result.update(
+        response=client.get("/admin/profile?requests=3&seconds=20&interval_ms=1", headers=headers)))
+    worker.start()
+    while not app.main.profiler.active:
+        time.sleep(0.01)
+    for _ in range(3):
+        client.post("/predict/batch", json={name: [value] * 2000 for name, value in payload.items()}, headers=headers)
+    worker.join(timeout=20)
+
+    profile = result["response"]
+    assert profile.status_code == 200
+    for line in profile.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
+
+
+def test_model_watcher_survives_bad_artifacts(monkeypatch):
+    import asyncio
+    import zipfile
+    import app.main
+
+    calls = []
+
+    def broken_reload():
+        calls.append(1)
+        raise zipfile.BadZipFile("truncated")
+
+    monkeypatch.setattr(app.main, "reload_model_if_changed", broken_reload)
+    monkeypatch.setattr(app.main, "MODEL_RELOAD_SECONDS", 0.01)
+
+    async def run():
+        watcher = asyncio.create_task(app.main.watch_model_file())
+        await asyncio.sleep(0.2)
+        assert not watcher.done()
+        watcher.cancel()
+
+    asyncio.run(run())
+    assert len(calls) > 1
+
+
+def test_every_path_rounds_alike(monkeypatch):
+    import numpy as np
+    import app.main
+
+    class TieEngine:
+        # round() and np.round disagree on 6.325
+        name = "tie"
+
+        def predict(self, X):
+            return np.full(len(X), 6.325)
+
+    monkeypatch.setattr(app.main, "engine", TieEngine())
+    monkeypatch.setattr(app.main, "MODEL_VERSION", "tie")
+    payload = {"sleep_hours": 6.5, "stress_level": 4, "time_of_day": 19, "workload_level": 8}
+    single = client.post("/predict", json=payload).json()["recommended_strength"]
+    batch = client.post("/predict/batch", json={k: [v] for k, v in payload.items()}).json()
+    plan = client.post("/plan", json={k: v for k, v in payload.items() if k != "time_of_day"}).json()
+    cached = client.get("/predict", params=payload, follow_redirects=True).json()
+    assert {single, batch["recommended_strength"][0], plan["recommended_strength"][0],
+            cached["recommended_strength"]} == {single}
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+
+from app.artifact import export_model, load_artifact
+from app.distill import distill, fidelity
+from app.schema import FEATURES, round_strength
+
+df = pd.read_csv("data/coffee_strength_dataset.csv")
+X = df[FEATURES]
+y = df["coffee_strength"]
+
+
+def test_forest_artifact_matches_sklearn(tmp_path):
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    engine = load_artifact(export_model(model, tmp_path / "model.npz"))
+
+    assert engine.n_trees == 10
+    rows = X.to_numpy(dtype=float)
+    np.testing.assert_allclose(engine.predict(rows), model.predict(X), atol=1e-5)
+    # Users see 2 decimals: ties like x.xx5 must round the same way as the pickle
+    expected = round_strength(model.predict(X))
+    assert (round_strength(engine.predict(rows)) == expected).all()
+    assert all(round_strength(engine.predict(rows[i:i + 1]))[0] == expected[i] for i in range(len(rows)))
+
+
+def test_export_replaces_atomically(tmp_path):
+    model = LinearRegression().fit(np.random.rand(20, 4), np.random.rand(20))
+    path = str(tmp_path / "model.npz")
+    export_model(model, path)
+    export_model(model, path)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["model.npz"]
+
+
+def test_linear_artifact_matches_sklearn(tmp_path):
+    model = LinearRegression().fit(X, y)
+    engine = load_artifact(export_model(model, tmp_path / "model.npz", compress=False))
+
+    np.testing.assert_allclose(engine.predict(X.to_numpy(dtype=float)), model.predict(X))
+
+
+def test_distilled_surrogate_round_trip(tmp_path):
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(X, y)
+    teacher = load_artifact(export_model(model, tmp_path / "model.npz"))
+    surrogate = distill(teacher)
+    loaded = load_artifact(export_model(surrogate, tmp_path / "surrogate.npz"))
+
+    rows = X.to_numpy(dtype=float)
+    np.testing.assert_allclose(loaded.predict(rows), surrogate.predict(rows), atol=1e-5)
+    np.testing.assert_allclose(loaded.predict(rows[:1]), surrogate.predict(rows[:1]), atol=1e-5)
+    assert fidelity(loaded, teacher, rows)["rmse_vs_teacher"] < 0.5
+
+
+def test_conformal_calibration_round_trip(tmp_path):
+    from app.conformal import calibrate, coverage
+
+    model = RandomForestRegressor(n_estimators=20, random_state=0).fit(X[:600], y[:600])
+    engine = load_artifact(export_model(model, tmp_path / "model.npz"))
+    rows = X.to_numpy(dtype=float)
+    calibration = calibrate(engine, rows[600:800], y[600:800], alpha=0.1)
+    engine = load_artifact(export_model(model, tmp_path / "model.npz", calibration=calibration))
+
+    assert engine.calibration == calibration
+    mean, lower, upper, std = engine.predict_interval(rows[800:])
+    np.testing.assert_allclose(mean, engine.predict(rows[800:]))
+    assert (lower <= mean).all() and (mean <= upper).all() and (std >= 0).all()
+    assert coverage(engine, rows[800:], y[800:]) >= 0.8
+
+
+def test_tree_explanations_sum_to_prediction(tmp_path):
+    model = RandomForestRegressor(n_estimators=10, random_state=0).fit(X, y)
+    engine = load_artifact(export_model(model, tmp_path / "model.npz"))
+    rows = X.to_numpy(dtype=float)
+    # Precomputed at load, not on the first explain request
+    assert engine.path_contributions.shape == (len(engine.value), len(FEATURES))
+
+    baseline, contributions = engine.explain(rows)
+    np.testing.assert_allclose(baseline + contributions.sum(axis=1), engine.predict(rows), atol=1e-4)
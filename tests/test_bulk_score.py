@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from app.artifact import export_model, load_artifact
+from app.bulk_score import score_file
+from app.schema import FEATURES
+
+df = pd.read_csv("data/coffee_strength_dataset.csv")
+
+
+def test_score_file_matches_engine(tmp_path):
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(df[FEATURES], df["coffee_strength"])
+    model_path = export_model(model, str(tmp_path / "model.npz"))
+    checkins = df[FEATURES].copy()
+    checkins.loc[3, "time_of_day"] = 3
+    checkins.to_csv(tmp_path / "in.csv", index=False)
+
+    expected = np.round(load_artifact(model_path).predict(checkins.to_numpy(dtype=float)), 2)
+    expected[3] = np.nan
+    for workers in (1, 2):
+        out = tmp_path / f"out_{workers}.csv"
+        rows, rejected, _ = score_file(str(tmp_path / "in.csv"), str(out), model_path, chunk_size=128, workers=workers)
+
+        scored = pd.read_csv(out)
+        assert (rows, rejected) == (len(checkins), 1)
+        assert list(scored.columns) == FEATURES + ["recommended_strength"]
+        np.testing.assert_allclose(scored["recommended_strength"], expected)
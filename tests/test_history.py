@@ -0,0 +1,68 @@
+import random
+from datetime import date, datetime, timedelta
+
+from app.history import HistoryStore
+
+
+def test_retention_keeps_aggregates_exact(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), max_rows=50)
+    rng = random.Random(0)
+    start = datetime(2025, 1, 1, 8)
+    entries = []
+    for i in range(200):
+        inputs = {"sleep_hours": 6.5, "stress_level": 5, "time_of_day": rng.randint(6, 22), "workload_level": 5}
+        strength = round(rng.uniform(1, 10), 1)
+        category = "light" if strength <= 4 else "medium" if strength <= 7 else "strong"
+        store.add("alice", inputs, strength, category, timestamp=start + timedelta(hours=6 * i))
+        entries.append((inputs["time_of_day"], strength, category))
+
+    kept = entries[-50:]
+    summary = store.summary("alice")
+    assert summary["count"] == 50
+    assert summary["average"] == round(sum(s for _, s, _ in kept) / 50, 2)
+    assert summary["categories"] == {c: sum(1 for *_, k in kept if k == c) for c in {k for *_, k in kept}}
+    assert sum(h["count"] for h in summary["hours"].values()) == 50
+    assert len(store.recent("alice", 5)) == 5 and store.recent("alice", 1)[0]["strength"] == kept[-1][1]
+
+    # 50 entries, four a day: twelve full days plus one entry on each side
+    daily = store.daily("alice", days=30, window=7, today=date(2025, 2, 20))
+    assert len(daily) == 14
+    assert sum(day["count"] for day in daily) == 50
+
+
+def test_rolling_average_uses_calendar_days(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"))
+    inputs = {"sleep_hours": 7.0, "stress_level": 3, "time_of_day": 9, "workload_level": 4}
+    store.add("alice", inputs, 2.0, "light", timestamp=datetime(2025, 1, 1, 9))
+    store.add("alice", inputs, 8.0, "strong", timestamp=datetime(2025, 2, 1, 9))
+
+    # A month-old entry is not part of February's 7-day window
+    assert store.daily("alice", days=60, today=date(2025, 2, 1))[-1]["rolling_average"] == 8.0
+    assert store.recent_average("alice", 7, today=date(2025, 2, 3)) == 8.0
+    assert store.recent_average("alice", 7, today=date(2025, 3, 1)) is None
+    assert store.daily("alice", days=30, today=date(2025, 3, 15)) == []
+
+
+def test_history_persists(tmp_path):
+    path = str(tmp_path / "history.db")
+    inputs = {"sleep_hours": 7.0, "stress_level": 3, "time_of_day": 9, "workload_level": 4}
+    HistoryStore(path).add("alice", inputs, 6.2, "medium")
+    reopened = HistoryStore(path)
+    assert reopened.summary("alice")["categories"] == {"medium": 1}
+    assert reopened.daily("alice")[0]["rolling_average"] == 6.2
+
+
+def test_history_is_per_user(tmp_path):
+    store = HistoryStore(str(tmp_path / "history.db"), max_rows=3)
+    inputs = {"sleep_hours": 7.0, "stress_level": 3, "time_of_day": 9, "workload_level": 4}
+    store.add("alice", inputs, 2.0, "light")
+    for _ in range(5):
+        store.add("bob", inputs, 9.0, "strong")
+
+    # Bob's saves neither show up in Alice's views nor push hers out of retention
+    assert store.summary("alice") == {"count": 1, "average": 2.0, "categories": {"light": 1},
+                                      "hours": {9: {"count": 1, "average": 2.0}}}
+    assert [entry["strength"] for entry in store.recent("alice")] == [2.0]
+    assert store.recent_average("alice") == 2.0
+    assert store.summary("bob")["count"] == 3
+    assert store.summary("carol")["count"] == 0
@@ -0,0 +1,64 @@
+from app.limits import AdmissionControl, LoadShedder, TokenBucketLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills_and_evicts():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(rate=2, burst=3, idle_seconds=60, clock=clock)
+
+    assert [limiter.allow("a")[0] for _ in range(4)] == [True, True, True, False]
+    assert limiter.allow("b")[0]
+    clock.now = 0.5
+    assert limiter.allow("a") == (True, 0.0)
+
+    clock.now = 120
+    limiter.allow("c")
+    assert list(limiter.buckets) == ["c"]
+
+
+def test_token_bucket_caps_clients():
+    limiter = TokenBucketLimiter(rate=1, burst=1, max_buckets=3, clock=FakeClock())
+    for key in "abcde":
+        limiter.allow(key)
+    assert list(limiter.buckets) == ["c", "d", "e"]
+
+
+def test_client_key_resolution():
+    control = AdmissionControl(api_keys=["good"], trusted_proxies=["10.0.0.0/8"])
+
+    def scope(peer, **headers):
+        return {"client": (peer, 1234), "headers": [(k.replace("_", "-").encode(), v.encode())
+                                                     for k, v in headers.items()]}
+
+    assert control.client_key(scope("1.2.3.4", x_api_key="good")) == "key:good"
+    assert control.client_key(scope("1.2.3.4", x_api_key="forged")) == "ip:1.2.3.4"
+    # Forwarded headers only count when the peer is a trusted proxy
+    assert control.client_key(scope("1.2.3.4", x_forwarded_for="9.9.9.9")) == "ip:1.2.3.4"
+    assert control.client_key(scope("10.0.0.5", x_forwarded_for="6.6.6.6, 5.5.5.5, 10.0.0.7")) == "ip:5.5.5.5"
+    any_peer = AdmissionControl(trusted_proxies=["*"])
+    assert any_peer.client_key(scope("172.16.0.1", x_forwarded_for="6.6.6.6, 5.5.5.5")) == "ip:5.5.5.5"
+
+
+def test_shedding_by_priority():
+    clock = FakeClock()
+    shedder = LoadShedder(slo_seconds=0.1, smoothing=1.0, half_life=1.0, clock=clock)
+    control = AdmissionControl(shedder=shedder)
+
+    shedder.observe(0.15)
+    assert control.admit("a", "low")[0] == 503
+    assert control.admit("a", "normal") is None
+    shedder.observe(0.3)
+    assert control.admit("a", "normal")[0] == 503
+    assert control.admit("a", "high") is None
+
+    clock.now = 5
+    assert control.admit("a", "low") is None
+    assert control.metrics()["shed_low"] == 1
+    assert control.metrics()["shed_normal"] == 1
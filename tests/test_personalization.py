@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from app.artifact import export_model, load_engine
+from app.feedback import FeedbackStore
+from app.personalization import ColdStore, UserCalibrationStore, build_table, build_user_store, offset_from, user_key
+from app.schema import FEATURES
+
+df = pd.read_csv("data/coffee_strength_dataset.csv")
+
+
+def small_engine(tmp_path):
+    model = RandomForestRegressor(n_estimators=5, random_state=0).fit(df[FEATURES], df["coffee_strength"])
+    return load_engine(export_model(model, str(tmp_path / "model.npz")))
+
+
+def test_cold_store_lookup(tmp_path):
+    users = [f"user-{i}" for i in range(5000)]
+    keys = [user_key(u) for u in users]
+    sums = np.arange(len(users), dtype=np.float64) / 1000
+    path = str(tmp_path / "users.npy")
+    np.save(path, build_table(keys, sums, np.full(len(users), 2)))
+
+    cold = ColdStore(path)
+    assert isinstance(cold.table, np.memmap)
+    assert len(cold.table) >= 2 * len(users)
+    for i in (0, 1234, 4999):
+        residual_sum, count = cold.get(keys[i])
+        assert count == 2 and abs(residual_sum - sums[i]) < 1e-6
+    assert cold.get(user_key("stranger")) is None
+
+
+def test_warm_set_is_bounded_and_keeps_live_feedback(tmp_path):
+    store = UserCalibrationStore(str(tmp_path / "missing.npy"), max_warm=3)
+    assert store.offset("alice") == 0.0
+    for offset in (10, 20, 30):
+        store.update("alice", 1.5, offset)
+    assert store.offset("alice") == offset_from(4.5, 3)
+    for name in ("bob", "carol", "dave", "erin"):
+        store.offset(name)
+    assert len(store.warm) == 3 and user_key("alice") not in store.warm
+    # Eviction only drops the cached cold entry, never live feedback
+    assert store.offset("alice") == offset_from(4.5, 3)
+
+
+def test_pending_feedback_is_capped(tmp_path):
+    store = UserCalibrationStore(str(tmp_path / "missing.npy"), max_pending=4)
+    for offset, name in enumerate(["alice", "alice", "bob", "carol", "bob"]):
+        store.update(name, 1.0, offset)
+    # Past the cap the least recently updated user goes; the log still has their rows
+    assert store.pending_rows == 3
+    assert store.offset("alice") == 0.0
+    assert store.offset("bob") == offset_from(2.0, 2)
+    assert store.offset("carol") == offset_from(1.0, 1)
+
+
+def test_build_user_store_from_feedback(tmp_path):
+    engine = small_engine(tmp_path)
+    feedback_path = str(tmp_path / "feedback.csv")
+    feedback = FeedbackStore(feedback_path)
+    rows = df.head(4)[FEATURES].to_dict("records")
+    for row in rows:
+        strength = float(engine.predict(np.array([[row[name] for name in FEATURES]]))[0]) + 2.0
+        feedback.append({**row, "coffee_strength": strength, "user_id": "alice"})
+    feedback.append({**rows[0], "coffee_strength": 5.0})
+
+    out_path = str(tmp_path / "users.npy")
+    assert build_user_store(feedback_path, engine, out_path) == 1
+    store = UserCalibrationStore(out_path)
+    assert abs(store.offset("alice") - offset_from(8.0, 4)) < 1e-5
+    assert store.offset("bob") == 0.0
+
+
+def test_reload_counts_live_feedback_once(tmp_path):
+    engine = small_engine(tmp_path)
+    feedback = FeedbackStore(str(tmp_path / "feedback.csv"))
+    out_path = str(tmp_path / "users.npy")
+    store = UserCalibrationStore(out_path)
+    row = df.head(1)[FEATURES].to_dict("records")[0]
+    residual = 9.0 - float(engine.predict(np.array([[row[name] for name in FEATURES]]))[0])
+
+    def give_feedback():
+        log_offset = feedback.append({**row, "coffee_strength": 9.0, "user_id": "alice"})
+        store.update("alice", residual, log_offset)
+
+    give_feedback()
+    give_feedback()
+    build_user_store(feedback.path, engine, out_path)
+    # Arrives after the rebuild read the log: must survive the reload
+    give_feedback()
+    assert store.reload()
+    assert abs(store.offset("alice") - offset_from(3 * residual, 3)) < 1e-5
@@ -0,0 +1,51 @@
+import joblib
+import pandas as pd
+from sklearn.linear_model import LinearRegression
+from sklearn.tree import DecisionTreeRegressor
+
+from app.artifact import export_model, load_artifact
+from app.feedback import FeedbackStore
+from app.retrain import load_splits, retrain
+from app.schema import FEATURES
+
+df = pd.read_csv("data/coffee_strength_dataset.csv")
+
+
+def test_retrain_promotes_only_better_models(tmp_path):
+    model_path = str(tmp_path / "model.npz")
+    feedback_path = str(tmp_path / "feedback.csv")
+    store = FeedbackStore(feedback_path)
+    for row in df.head(20).to_dict("records"):
+        store.append({**{name: row[name] for name in FEATURES}, "coffee_strength": row["coffee_strength"]})
+
+    train, holdout = load_splits(feedback_path=feedback_path)
+    assert len(train) + len(holdout) == 1020
+    assert len(holdout) == 204
+
+    first = retrain(model_path=model_path, feedback_path=feedback_path)
+    assert first["promoted"]
+    # Same data and seed: the candidate ties the current model and is not promoted
+    second = retrain(model_path=model_path, feedback_path=feedback_path)
+    assert not second["promoted"]
+    assert second["model_version"] == first["model_version"]
+
+
+def test_retrain_keeps_the_served_model(tmp_path, monkeypatch):
+    feedback_path = str(tmp_path / "feedback.csv")
+    FeedbackStore(feedback_path)
+    head = df.head(50)
+
+    # A linear model picked by --objective latency stays linear
+    model_path = str(tmp_path / "model.npz")
+    export_model(LinearRegression().fit(head[FEATURES], head["coffee_strength"]), model_path)
+    monkeypatch.setenv("MODEL_PATH", model_path)
+    assert retrain(feedback_path=feedback_path)["promoted"]
+    assert load_artifact(model_path).name == "linear"
+
+    # The pickle fallback is replaced by a pickle the API can still load
+    model_path = str(tmp_path / "model.pkl")
+    joblib.dump(DecisionTreeRegressor(max_depth=2).fit(head[FEATURES], head["coffee_strength"]), model_path)
+    monkeypatch.setenv("MODEL_PATH", model_path)
+    assert retrain(feedback_path=feedback_path)["promoted"]
+    promoted = joblib.load(model_path)
+    assert isinstance(promoted, DecisionTreeRegressor) and promoted.max_depth == 2
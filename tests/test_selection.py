@@ -0,0 +1,17 @@
+from app.selection import pareto_front, select_model
+
+results = {
+    "Linear Regression": {"cv_rmse": 0.61, "single_latency_us": 3.0, "artifact_bytes": 1_000},
+    "Decision Tree": {"cv_rmse": 0.68, "single_latency_us": 90.0, "artifact_bytes": 10_000},
+    "Random Forest": {"cv_rmse": 0.46, "single_latency_us": 180.0, "artifact_bytes": 750_000},
+}
+
+
+def test_select_model_respects_rmse_tolerance():
+    assert select_model(results, "rmse") == "Random Forest"
+    assert select_model(results, "latency", rmse_tolerance=0.05) == "Random Forest"
+    assert select_model(results, "latency", rmse_tolerance=0.5) == "Linear Regression"
+
+
+def test_pareto_front_drops_dominated_models():
+    assert pareto_front(results) == ["Random Forest", "Linear Regression"]
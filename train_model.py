@@ -2,6 +2,14 @@ import pandas as pd
 import numpy as np 
 import joblib
 import os 
+import time
+import argparse
+
+from app.artifact import export_model, load_artifact
+from app.conformal import calibrate
+from app.distill import distill, fidelity
+from app.schema import round_strength
+from app.selection import OBJECTIVES, measure_candidate, select_model, write_report
 
 from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
 from sklearn.metrics import mean_squared_error
@@ -11,7 +19,20 @@ from sklearn.tree import DecisionTreeRegressor
 from sklearn.ensemble import RandomForestRegressor
 
 
-data_path = "../FastAPI/MoodFuel/data/coffee_strength_dataset.csv"
+parser = argparse.ArgumentParser(description="Train and select the MoodFuel model")
+parser.add_argument("--objective", choices=sorted(OBJECTIVES), default="rmse",
+                    help="rmse picks the lowest CV RMSE; the others pick the cheapest model "
+                         "within --rmse-tolerance of it")
+parser.add_argument("--rmse-tolerance", type=float, default=0.05,
+                    help="allowed relative CV RMSE loss vs the best model, e.g. 0.05 = 5%%")
+parser.add_argument("--report", default="model/selection_report.json")
+parser.add_argument("--distill", action="store_true",
+                    help="also fit an additive lookup surrogate to model/surrogate.npz")
+parser.add_argument("--fidelity-tolerance", type=float, default=0.25,
+                    help="max held-out RMSE between surrogate and trained model before it is rejected")
+args = parser.parse_args()
+
+data_path = "data/coffee_strength_dataset.csv"
 df = pd.read_csv(data_path)
 
 print(df.head(5))
@@ -69,16 +90,26 @@ grid.fit(X_train, y_train)
 print("Best CV RMSE:", -grid.best_score_)
 print("Best params:", grid.best_params_)"""
 
-best_model_name = min(cv_results, key=cv_results.get)
-best_model = models[best_model_name]
-print("\nBest model based on CV:", best_model_name)
-
 # Convert y to 1D arrays
 y_train_1d = y_train.values.ravel()
 y_test_1d = y_test.values.ravel()
 
-# Fit best model
-best_model.fit(X_train, y_train_1d)
+# Fit every candidate and weigh its CV RMSE against serving cost. The report
+# is written on every run, so it always describes the model saved below
+results = {}
+for name, model in models.items():
+    model.fit(X_train, y_train_1d)
+    results[name] = {"cv_rmse": cv_results[name], **measure_candidate(model, X_test)}
+    r = results[name]
+    print(f"{name}: {r['single_latency_us']:.1f} us/row, {r['batch_latency_us'] / 1e3:.2f} ms/batch, "
+          f"{r['artifact_bytes']:,} bytes, load {r['load_ms']:.2f} ms")
+
+best_model_name = select_model(results, args.objective, args.rmse_tolerance)
+best_model = models[best_model_name]
+report = write_report(args.report, results, best_model_name, args.objective, args.rmse_tolerance)
+print(f"\nBest model by {args.objective} within {args.rmse_tolerance:.0%} of best CV RMSE:", best_model_name)
+print("Pareto front (CV RMSE vs latency):", report["pareto_front"])
+print(f"Selection report saved to {args.report}")
 
 # Predict
 y_pred = best_model.predict(X_test)
@@ -89,5 +120,39 @@ print("Test RMSE:", test_rmse)
 
 # Save Model
 os.makedirs("model", exist_ok=True)
-joblib.dump(best_model, "MoodFuel/model/model.pkl")
-print("✅ Model trained and saved to model/model.pkl")
\ No newline at end of file
+joblib.dump(best_model, "model/model.pkl")
+print("✅ Model trained and saved to model/model.pkl")
+
+# Export compact artifact for serving (see app/artifact.py)
+export_model(best_model, "model/model.npz")
+start = time.perf_counter()
+engine = load_artifact("model/model.npz")
+load_time = time.perf_counter() - start
+
+# Conformal calibration of forest prediction intervals on the held-out split
+if hasattr(engine, "predict_interval"):
+    calibration = calibrate(engine, X_test.to_numpy(dtype=float), y_test_1d)
+    export_model(best_model, "model/model.npz", calibration=calibration)
+    engine = load_artifact("model/model.npz")
+    print(f"✅ Conformal {1 - calibration['alpha']:.0%} intervals calibrated on {calibration['n']} rows "
+          f"(q = {calibration['q']:.3f})")
+artifact_pred = engine.predict(X_test.to_numpy(dtype=float))
+artifact_delta = abs(artifact_pred - y_pred).max()
+rounded_mismatch = int((round_strength(artifact_pred) != round_strength(y_pred)).sum())
+print(f"✅ Compact artifact saved to model/model.npz "
+      f"({os.path.getsize('model/model.npz'):,} bytes vs {os.path.getsize('model/model.pkl'):,} bytes pickle, "
+      f"load {load_time * 1e3:.1f} ms, max |delta| {artifact_delta:.2e}, "
+      f"{rounded_mismatch} of {len(y_pred)} rounded predictions differ)")
+
+# Distil into an additive lookup surrogate (serve with MODEL_ENGINE=surrogate)
+if args.distill:
+    surrogate = distill(engine)
+    check = fidelity(surrogate, engine, X_test.to_numpy(dtype=float), y_test_1d)
+    print(f"Surrogate fidelity on test set: RMSE vs model {check['rmse_vs_teacher']:.4f} "
+          f"(max {check['max_abs_vs_teacher']:.3f}), RMSE vs truth {check['rmse_surrogate']:.4f} "
+          f"(model {check['rmse_teacher']:.4f})")
+    if check["rmse_vs_teacher"] <= args.fidelity_tolerance:
+        export_model(surrogate, "model/surrogate.npz")
+        print(f"✅ Surrogate saved to model/surrogate.npz ({os.path.getsize('model/surrogate.npz'):,} bytes)")
+    else:
+        print(f"⚠️ Surrogate rejected: fidelity RMSE above {args.fidelity_tolerance}")